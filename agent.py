@@ -0,0 +1,53 @@
+import argparse
+from shared.agent.agent import Agent
+from shared.agent.collectors import COLLECTORS, ConnectionCollector, ExplanationCollector, SystemCollector
+from shared.llm.explanation_worker import ExplanationWorker
+from shared.net.port_scan import PortScanDetector
+
+
+def build_collectors(names, args):
+    collectors = []
+    for name in names:
+        if name == "connections":
+            detector = PortScanDetector(window_seconds=args.port_scan_window, port_threshold=args.port_threshold)
+            collectors.append(ConnectionCollector(args.models_dir, detector))
+        elif name == "system":
+            collectors.append(SystemCollector(args.baseline_state or None))
+        else:
+            collectors.append(COLLECTORS[name]())
+    if "system" in names and not args.no_explanations:
+        collectors.append(ExplanationCollector(ExplanationWorker()))
+    return collectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the server and network collectors in one process")
+    parser.add_argument("--collectors", default=",".join(COLLECTORS),
+                        help=f"comma-separated subset of {', '.join(COLLECTORS)}")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between ticks")
+    parser.add_argument("--server-log", default="data/log.csv", help="server rows ('' to disable)")
+    parser.add_argument("--network-log", default="data/network_log.csv", help="network rows ('' to disable)")
+    parser.add_argument("--models-dir", default="network_anomaly/models")
+    parser.add_argument("--port-scan-window", type=float, default=60)
+    parser.add_argument("--port-threshold", type=int, default=10)
+    parser.add_argument("--baseline-state", default="data/baselines-agent.npz",
+                        help="where the metric baselines persist across restarts ('' to keep them in memory)")
+    parser.add_argument("--no-explanations", action="store_true", help="do not queue LLM explanations")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.collectors.split(",") if name.strip()]
+    unknown = [name for name in names if name not in COLLECTORS]
+    if unknown:
+        parser.error(f"unknown collectors: {', '.join(unknown)}")
+    # Keep the documented order so later collectors can use earlier ones' fields
+    names = [name for name in COLLECTORS if name in names]
+
+    outputs = {name: path for name, path in (("server", args.server_log), ("network", args.network_log)) if path}
+    agent = Agent(build_collectors(names, args), outputs, interval=args.interval)
+    print(f"🛰️ Starting agent with collectors: {', '.join(names)}")
+    agent.run(args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import copy
+import json
+import time
+import shutil
+import argparse
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from shared.data.feature_encoder import get_encoder, ENCODER_FILE
+from shared.data.kdd_loader import features, timed_stage
+from shared.data.dataset_cache import load_kdd_cached, load_features_cached
+from shared.ml.model_registry import BINARY_MODEL_FILE, MULTICLASS_MODEL_FILE
+from shared.ml.flat_forest import FlatForest, export_forest
+
+# (name, trees kept from the baseline or retrain params); retrained variants need the training set
+VARIANTS = [
+    ("trees-50", {"keep_trees": 50}),
+    ("trees-25", {"keep_trees": 25}),
+    ("depth-16", {"n_estimators": 50, "max_depth": 16}),
+    ("depth-12-leaf-2", {"n_estimators": 25, "max_depth": 12, "min_samples_leaf": 2}),
+]
+
+
+def truncate_forest(model, n_trees):
+    """Same forest with only its first ``n_trees`` trees"""
+    compact = copy.copy(model)
+    compact.estimators_ = model.estimators_[:n_trees]
+    compact.n_estimators = len(compact.estimators_)
+    return compact
+
+
+def retrain_forest(X, y, n_jobs, **params):
+    clf = RandomForestClassifier(class_weight="balanced", random_state=42, n_jobs=n_jobs, **params)
+    return clf.fit(X, y)
+
+
+def _median_latency(fn, repeats=100):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def _f1(y_true, y_pred, binary):
+    average = "binary" if binary else "macro"
+    return round(f1_score(y_true, y_pred, average=average, zero_division=0) * 100, 2)
+
+
+def measure(name, save, load, X, y_true, binary, workdir):
+    """Serialize with ``save(path)``, then report size, load time, latency and F1 of what ``load`` returns"""
+    path = os.path.join(workdir, name)
+    save(path)
+    start = time.perf_counter()
+    model = load(path)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X)
+    batch_seconds = time.perf_counter() - start
+    row = X.iloc[:1] if not isinstance(model, FlatForest) else X.to_numpy()[0]
+    return {
+        "file_mb": round(os.path.getsize(path) / 1e6, 2),
+        "load_seconds": round(load_seconds, 3),
+        "row_ms": round(_median_latency(lambda: model.predict(row)) * 1e3, 3),
+        "batch_seconds": round(batch_seconds, 3),
+        "f1": _f1(y_true, y_pred, binary),
+    }
+
+
+def compact_model(model_file, args, X_test, y_test, X_train, y_train, workdir):
+    binary = model_file == BINARY_MODEL_FILE
+    baseline = joblib.load(os.path.join(args.models_dir, model_file))
+
+    candidates = [("baseline", baseline)]
+    for name, params in VARIANTS:
+        if "keep_trees" in params:
+            if params["keep_trees"] < len(baseline.estimators_):
+                candidates.append((name, truncate_forest(baseline, params["keep_trees"])))
+        elif X_train is not None:
+            with timed_stage(f"retrain {model_file} {name}"):
+                candidates.append((name, retrain_forest(X_train, y_train, args.n_jobs, **params)))
+
+    results = []
+    for name, model in candidates:
+        flat = FlatForest.from_sklearn(model)
+        forms = {
+            "pickle": measure(f"{name}.pkl", lambda p: joblib.dump(model, p), joblib.load,
+                              X_test, y_test, binary, workdir),
+            "pickle-z3": measure(f"{name}.z3.pkl", lambda p: joblib.dump(model, p, compress=3), joblib.load,
+                                 X_test, y_test, binary, workdir),
+            "flat-q16": measure(f"{name}.q16.npz", lambda p: flat.quantized().save(p, compressed=True), FlatForest.load,
+                                X_test, y_test, binary, workdir),
+        }
+        results.append({"variant": name, "trees": len(model.estimators_), "nodes": len(flat.feature),
+                        "model": model, "forms": forms})
+
+    baseline_f1 = results[0]["forms"]["pickle"]["f1"]
+    for result in results:
+        for form in result["forms"].values():
+            form["f1_delta"] = round(form["f1"] - baseline_f1, 2)
+            form["accepted"] = form["f1"] >= baseline_f1 - args.tolerance
+
+    # Deploy the smallest variant whose compressed pickle and quantized export both pass the gate
+    accepted = [r for r in results if r["forms"]["pickle-z3"]["accepted"] and r["forms"]["flat-q16"]["accepted"]]
+    if not accepted:
+        # Float16 leaves can flip predictions even for the baseline (e.g. with --tolerance 0)
+        print(f"⚠️ No variant of {model_file} passed the F1 gate, keeping the baseline with an unquantized export")
+        return baseline_f1, results, None
+    chosen = min(accepted, key=lambda r: r["forms"]["flat-q16"]["file_mb"])
+    return baseline_f1, results, chosen
+
+
+def print_table(model_file, baseline_f1, results, chosen):
+    print(f"\n📦 {model_file} (baseline F1 {baseline_f1})")
+    print(f"{'variant':<18}{'form':<11}{'trees':>6}{'nodes':>9}{'MB':>8}{'load s':>8}{'row ms':>8}"
+          f"{'batch s':>9}{'F1':>8}{'ΔF1':>7}  gate")
+    for result in results:
+        for form_name, form in result["forms"].items():
+            print(f"{result['variant']:<18}{form_name:<11}{result['trees']:>6}{result['nodes']:>9}"
+                  f"{form['file_mb']:>8}{form['load_seconds']:>8}{form['row_ms']:>8}{form['batch_seconds']:>9}"
+                  f"{form['f1']:>8}{form['f1_delta']:>7}  {'✅' if form['accepted'] else '❌'}")
+    print(f"➡️ Selected {chosen['variant']}" if chosen else "➡️ Kept baseline (no variant passed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build smaller forests and keep only those that hold F1 on Test.txt")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--test-path", default="data/dataset/Test.txt")
+    parser.add_argument("--train-path", default="data/dataset/Train.txt",
+                        help="needed for the depth-limited variants; skipped if missing")
+    parser.add_argument("--output-dir", default=None, help="where to write the selected models (default: <models-dir>/compact)")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="max F1 drop in percentage points")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join(args.models_dir, "compact")
+    workdir = os.path.join(output_dir, "candidates")
+    os.makedirs(workdir, exist_ok=True)
+
+    encoder = get_encoder(args.models_dir)
+    X_test, y_test_binary, y_test_multi = load_features_cached(args.test_path, encoder)
+    X_train = train = None
+    if os.path.exists(args.train_path):
+        train = encoder.transform(load_kdd_cached(args.train_path))
+        X_train = features(train)
+    else:
+        print(f"⚠️ {args.train_path} not found, skipping retrained variants")
+
+    report = {"tolerance": args.tolerance, "test_path": args.test_path, "models": {}}
+    for model_file, y_test, label in ((BINARY_MODEL_FILE, y_test_binary, "attack_binary"),
+                                      (MULTICLASS_MODEL_FILE, y_test_multi, "attack_multi")):
+        y_train = train[label] if train is not None else None
+        baseline_f1, results, chosen = compact_model(model_file, args, X_test, y_test, X_train, y_train, workdir)
+        print_table(model_file, baseline_f1, results, chosen)
+
+        output_path = os.path.join(output_dir, model_file)
+        selected = chosen or results[0]
+        joblib.dump(selected["model"], output_path, compress=3)
+        export_forest(output_path, selected["model"], quantized=chosen is not None)
+        report["models"][model_file] = {
+            "baseline_f1": baseline_f1,
+            "selected": selected["variant"],
+            "fallback": chosen is None,
+            "variants": [{key: value for key, value in r.items() if key != "model"} for r in results],
+        }
+
+    shutil.copy(os.path.join(args.models_dir, ENCODER_FILE), os.path.join(output_dir, ENCODER_FILE))
+    shutil.rmtree(workdir, ignore_errors=True)
+    report_path = os.path.join(output_dir, "compaction_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"\n📝 Compact models and report saved to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
-from flask import Flask, render_template, send_file, request, jsonify
-import pandas as pd
+from flask import Flask, Response, render_template, send_file, request, jsonify, stream_with_context
 import os
-import joblib
 import json
-from sklearn.preprocessing import LabelEncoder
 from utils import get_top_apps, get_recent_explanations
+from shared.ml.model_registry import registry
+from shared.data.dataset_cache import load_raw_cached
+from shared.data.row_index import datatables_page
+from shared.ml.prediction_store import predict_frame
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+from shared.logs.metrics_ring import read_metrics
+from shared.logs.live_feed import get_live_feed
+from shared.llm.explanation_worker import resolve_pending
+from shared.llm.explanation_cache import explanation_cache
+from shared.llm.groq_client import get_groq_client
 import win32evtlog
 
 app = Flask(__name__)
@@ -62,6 +69,36 @@ def download_dataset(dataset_name):
         return send_file(dataset_path, as_attachment=True)
     return "Dataset not found", 404
 
+@app.route('/api/dataset/<dataset_name>/rows')
+def dataset_rows(dataset_name):
+    dataset_path = os.path.join("data", "dataset", os.path.basename(dataset_name))
+    if not os.path.exists(dataset_path):
+        return jsonify({"error": "Dataset not found"}), 404
+    try:
+        return jsonify(datatables_page(dataset_path, request.args))
+    except Exception as e:
+        print("⚠️ Error paging dataset:", e)
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/models')
+def model_status():
+    return jsonify(registry.stats())
+
+@app.route('/api/metrics')
+def metrics_series():
+    return jsonify(get_metrics())
+
+@app.route('/api/stream')
+def live_stream():
+    """Server-Sent Events: new metric points, anomalies and explanations as they are logged"""
+    subscription = get_live_feed(SERVER_LOG_PATH).subscribe()
+    return Response(stream_with_context(subscription.stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/llm')
+def llm_status():
+    return jsonify({"client": get_groq_client().metrics(), "cache": explanation_cache.stats()})
+
 def get_model_scores():
     try:
         with open("data/evaluation_scores.json", "r") as f:
@@ -72,56 +109,10 @@ def get_model_scores():
             "multiclass": {"accuracy": "-", "precision": "-", "recall": "-", "f1_score": "-"}
         }
 
-def explain_prediction(row):
-    reasons_bin = []
-    reasons_multi = []
-
-    if row['Binary_Prediction'] == 'Attack':
-        if row.get('serror_rate', 0) > 0.5:
-            reasons_bin.append("High SYN error rate")
-        if row.get('rerror_rate', 0) > 0.5:
-            reasons_bin.append("High REJ error rate")
-        if row.get('src_bytes', 0) == 0 and row.get('dst_bytes', 0) == 0:
-            reasons_bin.append("No data transferred")
-        if row.get('logged_in', 1) == 0:
-            reasons_bin.append("Unauthenticated access attempt")
-    else:
-        reasons_bin.append("Normal traffic")
-
-    attack = row['Attack_Class']
-    if attack == 'DOS':
-        if row.get('count', 0) > 100 or row.get('serror_rate', 0) > 0.5:
-            reasons_multi.append("High traffic volume or error rate")
-    elif attack == 'PROBE':
-        if row.get('srv_count', 0) > 50 or row.get('diff_srv_rate', 0) > 0.5:
-            reasons_multi.append("Scanning behavior across multiple services")
-    elif attack == 'R2L':
-        if row.get('num_failed_logins', 0) > 0:
-            reasons_multi.append("Failed login attempts detected")
-    elif attack == 'U2R':
-        if row.get('root_shell', 0) > 0 or row.get('num_file_creations', 0) > 0:
-            reasons_multi.append("Privilege escalation or file access")
-    elif attack == 'normal':
-        reasons_multi.append("Normal behavior")
-
-    return "; ".join(reasons_bin), "; ".join(reasons_multi)
-
 def get_dataset_sample(path, limit=100):
     try:
-        df = pd.read_csv(path, names=COLUMNS).head(limit)
-        for col in ["protocol_type", "service", "flag"]:
-            df[col] = LabelEncoder().fit_transform(df[col])
-        X = df.drop(columns=["attack", "last_flag"])
-
-        binary_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "binary_model.pkl"))
-        multiclass_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "multiclass_model.pkl"))
-
-        df["Binary_Prediction"] = ["Normal" if p == 0 else "Attack" for p in binary_model.predict(X)]
-        df["Attack_Class"] = multiclass_model.predict(X)
-
-        explanations = [explain_prediction(row) for _, row in df.iterrows()]
-        df["Explanation_Binary"] = [e[0] for e in explanations]
-        df["Explanation_Multi"] = [e[1] for e in explanations]
+        df = load_raw_cached(path, limit)
+        df = predict_frame(df, path, NETWORK_MODELS_PATH)
 
         display_cols = [
             "duration", "protocol_type", "service", "flag", "src_bytes", "dst_bytes",
@@ -135,20 +126,8 @@ def get_dataset_sample(path, limit=100):
 
 def get_recent_dataset_entries(path, limit=10):
     try:
-        df = pd.read_csv(path, names=COLUMNS).tail(limit)
-        for col in ["protocol_type", "service", "flag"]:
-            df[col] = LabelEncoder().fit_transform(df[col])
-        X = df.drop(columns=["attack", "last_flag"])
-
-        binary_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "binary_model.pkl"))
-        multiclass_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "multiclass_model.pkl"))
-
-        df["Binary_Prediction"] = ["Normal" if p == 0 else "Attack" for p in binary_model.predict(X)]
-        df["Attack_Class"] = multiclass_model.predict(X)
-
-        explanations = [explain_prediction(row) for _, row in df.iterrows()]
-        df["Explanation_Binary"] = [e[0] for e in explanations]
-        df["Explanation_Multi"] = [e[1] for e in explanations]
+        df = load_raw_cached(path, limit, from_end=True)
+        df = predict_frame(df, path, NETWORK_MODELS_PATH)
 
         return df.to_dict(orient="records")
     except Exception as e:
@@ -157,10 +136,8 @@ def get_recent_dataset_entries(path, limit=10):
 
 def get_recent_anomalies(limit=10):
     try:
-        df = pd.read_csv(SERVER_LOG_PATH)
-        if "anomaly" not in df.columns:
-            return []
-        return df[df["anomaly"] == 1].sort_values("timestamp", ascending=False).head(limit).to_dict(orient="records")
+        store = open_log_store(SERVER_LOG_PATH, SERVER_LOG_SCHEMA)
+        return resolve_pending(list(reversed(store.tail(limit, where={"anomaly": 1}))))
     except Exception as e:
         print("⚠️ Error loading anomalies:", e)
         return []
@@ -188,13 +165,17 @@ def get_event_logs(max_logs=10):
     return logs
 
 def get_metrics():
+    metrics = read_metrics(SERVER_LOG_PATH, 100)
+    if metrics is not None:
+        return metrics
     try:
-        df = pd.read_csv(SERVER_LOG_PATH).tail(100)
+        store = open_log_store(SERVER_LOG_PATH, SERVER_LOG_SCHEMA)
+        rows = store.tail(100, columns=["timestamp", "cpu", "memory", "disk"])
         return {
-            'cpu': df['cpu'].tolist(),
-            'memory': df['memory'].tolist(),
-            'disk': df['disk'].tolist(),
-            'timestamp': df['timestamp'].tolist()
+            'cpu': [row['cpu'] for row in rows],
+            'memory': [row['memory'] for row in rows],
+            'disk': [row['disk'] for row in rows],
+            'timestamp': [row['timestamp'] for row in rows]
         }
     except:
         return {'cpu': [], 'memory': [], 'disk': [], 'timestamp': []}
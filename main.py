@@ -1,151 +1,106 @@
 import psutil
-import time
-import csv
-import os
 from datetime import datetime
 from utils import detect_anomaly, detect_new_ips, detect_port_scan, get_top_apps
-from shared.llm.llm_utils import explain_anomaly_via_llm
-import joblib
-import pandas as pd
+from shared.llm.explanation_worker import ExplanationWorker
+from shared.ml.flat_forest import score_connections
+from shared.net.connection_features import ConnectionMonitor
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+from shared.logs.log_writer import BatchedLogWriter
+from shared.logs.metrics_ring import MetricsRing
+from shared.host.cpu_monitor import CpuMonitor
+from shared.host.scheduler import Scheduler
+from shared.host.system_anomaly import top_app_metric
 
 LOG_FILE = 'data/log.csv'
+log_store = open_log_store(LOG_FILE, SERVER_LOG_SCHEMA)
+log_writer = None
+metrics_ring = None
 seen_ips = set()
+CPU_SAMPLE_INTERVAL = 0.1  # seconds
+MONITOR_INTERVAL = 5  # seconds
+STATS_INTERVAL = 300  # seconds
 
 def init_csv():
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, mode="w", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=[
-                "timestamp", "cpu", "memory", "disk", "anomaly",
-                "anomaly_type", "severity", "top_app_name", "explanation",
-                "model_prediction", "model_class"
-            ])
-            writer.writeheader()
-
-def log_data(data):  
-    with open(LOG_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=data.keys())
-        writer.writerow(data)
-
-def main_loop():
-    init_csv()
-
-    binary_model = joblib.load("network_anomaly/models/binary_model.pkl")
-    multi_model = joblib.load("network_anomaly/models/multiclass_model.pkl")
-
-    print("📡 Starting anomaly detection loop...")
-    while True:
-        try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"📊 [{timestamp}] Monitoring...")
-
-            cpu = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory().percent
-            disk = psutil.disk_usage('/').percent
-
-            anomaly, anomaly_type, severity = detect_anomaly(cpu, memory, disk)
-            new_ip_detected = detect_new_ips(seen_ips)
-            if new_ip_detected:
-                print(f"🆕 New IP(s) detected: {new_ip_detected}")
-
-            port_scan_detected = detect_port_scan()
-            if port_scan_detected:
-                print(f"🚨 Port scan activity from: {port_scan_detected}")
-
-            top_apps = get_top_apps()
-            metric_type = "memory"
-            if anomaly_type:
-                if "CPU" in anomaly_type:
-                    metric_type = "cpu"
-                elif "Memory" in anomaly_type:
-                    metric_type = "memory"
-                elif "Disk" in anomaly_type:
-                    metric_type = "disk"
-
-            top_app_data = top_apps.get(metric_type, {})
-            top_app_name = top_app_data.get("name", "None")
-
-            if anomaly:
-                row = {
-                    "cpu": cpu,
-                    "memory": memory,
-                    "disk": disk,
-                    "anomaly_type": anomaly_type,
-                    "top_app_name": top_app_name
-                }
-                explanation = explain_anomaly_via_llm(row)
-            else:
-                explanation = ""
-
-            # Simulate sample input for ML model
-            sample = pd.DataFrame([{
-                "duration": 0,
-                "protocol_type": 1,
-                "service": 1,
-                "flag": 1,
-                "src_bytes": int(cpu * 100),
-                "dst_bytes": int(memory * 100),
-                "land": 0,
-                "wrong_fragment": 0,
-                "urgent": 0,
-                "hot": 0,
-                "num_failed_logins": 0,
-                "logged_in": 1,
-                "num_compromised": 0,
-                "root_shell": 0,
-                "su_attempted": 0,
-                "num_root": 0,
-                "num_file_creations": 0,
-                "num_shells": 0,
-                "num_access_files": 0,
-                "num_outbound_cmds": 0,
-                "is_host_login": 0,
-                "is_guest_login": 0,
-                "count": 1,
-                "srv_count": 1,
-                "serror_rate": 0,
-                "srv_serror_rate": 0,
-                "rerror_rate": 0,
-                "srv_rerror_rate": 0,
-                "same_srv_rate": 1,
-                "diff_srv_rate": 0,
-                "srv_diff_host_rate": 0,
-                "dst_host_count": 1,
-                "dst_host_srv_count": 1,
-                "dst_host_same_srv_rate": 1,
-                "dst_host_diff_srv_rate": 0,
-                "dst_host_same_src_port_rate": 1,
-                "dst_host_srv_diff_host_rate": 0,
-                "dst_host_serror_rate": 0,
-                "dst_host_srv_serror_rate": 0,
-                "dst_host_rerror_rate": 0,
-                "dst_host_srv_rerror_rate": 0
-            }])
-
-            # Predict using trained ML models
-            binary_pred = int(binary_model.predict(sample)[0])
-            multi_pred = str(multi_model.predict(sample)[0])
-
-            # Log everything
-            log_data({
-                "timestamp": timestamp,
+    global log_writer, metrics_ring
+    log_store.init()
+    log_writer = BatchedLogWriter(log_store, flush_interval=1.0, batch_size=100)
+    # Dashboards read recent samples from shared memory instead of re-reading the log
+    metrics_ring = MetricsRing.create(LOG_FILE)
+
+def log_data(data):
+    log_writer.enqueue(data)
+    if metrics_ring is not None:
+        metrics_ring.append(data)
+
+def monitor_once(cpu_monitor, explanation_worker, connection_monitor):
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"📊 [{timestamp}] Monitoring...")
+
+        # Busiest second since the last run, sampled every CPU_SAMPLE_INTERVAL without blocking
+        _, cpu = cpu_monitor.take()
+        memory = psutil.virtual_memory().percent
+        disk = psutil.disk_usage('/').percent
+
+        anomaly, anomaly_type, severity = detect_anomaly(cpu, memory, disk)
+        new_ip_detected = detect_new_ips(seen_ips)
+        if new_ip_detected:
+            print(f"🆕 New IP(s) detected: {new_ip_detected}")
+
+        port_scan_detected = detect_port_scan()
+        if port_scan_detected:
+            print(f"🚨 Port scan activity from: {port_scan_detected}")
+
+        top_apps = get_top_apps()
+        top_app_data = top_apps.get(top_app_metric(anomaly_type), {})
+        top_app_name = top_app_data.get("name", "None")
+
+        if anomaly:
+            row = {
                 "cpu": cpu,
                 "memory": memory,
                 "disk": disk,
-                "anomaly": int(anomaly),
-                "anomaly_type": anomaly_type if anomaly else "None",
-                "severity": severity if anomaly else "None",
-                "top_app_name": top_app_name,
-                "explanation": explanation,
-                "model_prediction": binary_pred,
-                "model_class": multi_pred
-            })
+                "anomaly_type": anomaly_type,
+                "top_app_name": top_app_name
+            }
+            explanation = explanation_worker.submit(row, timestamp)
+        else:
+            explanation = ""
+
+        # Score connections opened since the last cycle (KDD features from the live socket table)
+        binary_pred, multi_pred = score_connections(connection_monitor.poll(), "network_anomaly/models")
+
+        # Log everything
+        log_data({
+            "timestamp": timestamp,
+            "cpu": cpu,
+            "memory": memory,
+            "disk": disk,
+            "anomaly": int(anomaly),
+            "anomaly_type": anomaly_type if anomaly else "None",
+            "severity": severity if anomaly else "None",
+            "top_app_name": top_app_name,
+            "explanation": explanation,
+            "model_prediction": binary_pred,
+            "model_class": multi_pred
+        })
+
+    except Exception as e:
+        print("⚠️ Error during monitoring:", e)
 
-        except Exception as e:
-            print("⚠️ Error during monitoring:", e)
+def main_loop():
+    init_csv()
+    explanation_worker = ExplanationWorker()
+    connection_monitor = ConnectionMonitor()
+    cpu_monitor = CpuMonitor()
 
-        time.sleep(5)
+    print("📡 Starting anomaly detection loop...")
+    scheduler = Scheduler()
+    scheduler.every(CPU_SAMPLE_INTERVAL, cpu_monitor.sample, name="cpu")
+    scheduler.every(MONITOR_INTERVAL, lambda: monitor_once(cpu_monitor, explanation_worker, connection_monitor),
+                    name="monitor", delay=1.0)
+    scheduler.every(STATS_INTERVAL, scheduler.print_stats, name="stats", delay=STATS_INTERVAL)
+    scheduler.run()
 
 if __name__ == "__main__":
     main_loop()
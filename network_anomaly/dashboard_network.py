@@ -1,11 +1,21 @@
-from flask import Flask, render_template, send_file, request
+from flask import Flask, render_template, send_file, request, jsonify
 import pandas as pd
 import os
+import sys
 import json
-import joblib
-from sklearn.preprocessing import LabelEncoder
 from utils_network import detect_new_ips, detect_port_scan
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from shared.ml.model_registry import get_network_models, registry
+from shared.data.feature_encoder import get_encoder
+from shared.data.dataset_cache import load_raw_cached
+from shared.data.row_index import datatables_page
+from shared.ml.prediction_store import predict_frame, score_features
+from shared.ml.micro_batcher import MicroBatcher, SchemaError, records_to_frame
+
 app = Flask(__name__)
 
 # === Paths ===
@@ -14,6 +24,10 @@ DATASET_DIR = os.path.join(BASE_DIR, "..", "data", "dataset")
 NETWORK_MODELS_PATH = os.path.join(BASE_DIR, "models")
 EVAL_PATH = os.path.join(BASE_DIR, "..", "data", "evaluation_scores.json")
 
+# === Batched prediction API (concurrent requests share one model call) ===
+PREDICT_TIMEOUT = 10
+predict_batcher = MicroBatcher(lambda X: score_features(X, NETWORK_MODELS_PATH), max_wait=0.005)
+
 # === Column Names (as per dataset) ===
 COLUMNS = [
     "duration", "protocol_type", "service", "flag", "src_bytes", "dst_bytes", "land",
@@ -72,17 +86,33 @@ def download_dataset(dataset_name):
         return send_file(dataset_path, as_attachment=True)
     return "Dataset not found", 404
 
+@app.route('/api/dataset/<dataset_name>/rows')
+def dataset_rows(dataset_name):
+    dataset_path = os.path.join(DATASET_DIR, os.path.basename(dataset_name))
+    if not os.path.exists(dataset_path):
+        return jsonify({"error": "Dataset not found"}), 404
+    try:
+        return jsonify(datatables_page(dataset_path, request.args))
+    except Exception as e:
+        print("⚠️ Error paging dataset:", e)
+        return jsonify({"error": str(e)}), 400
+
 @app.route('/predict_manual', methods=['POST'])
 def predict_manual():
     try:
         input_data = request.form.to_dict()
         df = pd.DataFrame([input_data])
 
+        # Categorical fields accept either raw values ("tcp") or numeric codes
+        encoder = get_encoder(NETWORK_MODELS_PATH)
         for col in df.columns:
-            df[col] = pd.to_numeric(df[col])
+            value = input_data[col].strip()
+            if col in encoder.categories and not value.isdigit():
+                df[col] = encoder.encode_value(col, value)
+            else:
+                df[col] = pd.to_numeric(df[col])
 
-        binary_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "binary_model.pkl"))
-        multi_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "multiclass_model.pkl"))
+        binary_model, multi_model = get_network_models(NETWORK_MODELS_PATH)
 
         binary_pred = binary_model.predict(df)[0]
         multi_pred = multi_model.predict(df)[0]
@@ -95,6 +125,32 @@ def predict_manual():
     except Exception as e:
         return f"❌ Error in prediction: {e}", 500
 
+@app.route('/api/predict', methods=['POST'])
+def api_predict():
+    payload = request.get_json(silent=True)
+    records = payload.get("records") if isinstance(payload, dict) else payload
+    try:
+        X = records_to_frame(records, get_encoder(NETWORK_MODELS_PATH))
+    except SchemaError as e:
+        return jsonify({"error": str(e), "details": e.errors}), 400
+
+    try:
+        results = predict_batcher.submit(X).result(timeout=PREDICT_TIMEOUT)
+    except Exception as e:
+        print("⚠️ Error in batch prediction:", e)
+        return jsonify({"error": f"Prediction failed: {e}"}), 500
+
+    keys = list(results)
+    return jsonify({"predictions": [dict(zip(keys, values)) for values in zip(*results.values())]})
+
+@app.route('/api/predict/stats')
+def predict_stats():
+    return jsonify(predict_batcher.metrics())
+
+@app.route('/api/models')
+def model_status():
+    return jsonify(registry.stats())
+
 
 # === Utility Functions ===
 
@@ -108,53 +164,10 @@ def get_model_scores():
             "multiclass": {"accuracy": "-", "precision": "-", "recall": "-", "f1_score": "-"}
         }
 
-def explain_prediction(row):
-    if row['Binary_Prediction'] == 'Attack':
-        binary_exp = (
-            f"The connection was classified as an **attack** because of unusual patterns such as "
-            f"high source bytes ({row['src_bytes']}), service type '{row['service']}', and flag '{row['flag']}'. "
-            f"The protocol used was '{row['protocol_type']}', which, in combination with login status ({'logged in' if row['logged_in'] else 'not logged in'}), "
-            f"suggests potentially malicious behavior."
-        )
-    else:
-        binary_exp = (
-            f"The connection was classified as **normal**. The values of source bytes ({row['src_bytes']}), service type '{row['service']}', "
-            f"and protocol '{row['protocol_type']}' are within expected ranges. Also, the login status "
-            f"({ 'logged in' if row['logged_in'] else 'not logged in' }) supports normal activity."
-        )
-
-    attack_class = row['Attack_Class']
-    if attack_class.lower() == "normal":
-        multi_exp = "No attack type detected. This connection exhibits features consistent with legitimate network behavior."
-    else:
-        multi_exp = (
-            f"The model identified this connection as '{attack_class.upper()}' attack due to characteristics like service: '{row['service']}', "
-            f"flag: '{row['flag']}', and high frequency counts (count: {row['count']}, srv_count: {row['srv_count']}). "
-            f"These features align with patterns seen in historical '{attack_class}' attacks."
-        )
-
-    return binary_exp, multi_exp
-
 def get_dataset_sample(path, limit=100):
     try:
-        df = pd.read_csv(path, names=COLUMNS).head(limit)
-        label_encoders = {}
-
-        for col in ["protocol_type", "service", "flag"]:
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col])
-            label_encoders[col] = le
-
-        X = df.drop(columns=["attack", "last_flag"])
-        binary_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "binary_model.pkl"))
-        multiclass_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "multiclass_model.pkl"))
-
-        df["Binary_Prediction"] = ["Normal" if p == 0 else "Attack" for p in binary_model.predict(X)]
-        df["Attack_Class"] = multiclass_model.predict(X)
-
-        explanations = [explain_prediction(row) for _, row in df.iterrows()]
-        df["Explanation_Binary"] = [e[0] for e in explanations]
-        df["Explanation_Multi"] = [e[1] for e in explanations]
+        df = load_raw_cached(path, limit)
+        df = predict_frame(df, path, NETWORK_MODELS_PATH)
 
         return df.to_dict(orient="records")
 
@@ -164,21 +177,8 @@ def get_dataset_sample(path, limit=100):
 
 def get_recent_dataset_entries(path, limit=10):
     try:
-        df = pd.read_csv(path, names=COLUMNS).tail(limit)
-
-        for col in ["protocol_type", "service", "flag"]:
-            df[col] = LabelEncoder().fit_transform(df[col])
-
-        X = df.drop(columns=["attack", "last_flag"])
-        binary_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "binary_model.pkl"))
-        multiclass_model = joblib.load(os.path.join(NETWORK_MODELS_PATH, "multiclass_model.pkl"))
-
-        df["Binary_Prediction"] = ["Normal" if p == 0 else "Attack" for p in binary_model.predict(X)]
-        df["Attack_Class"] = multiclass_model.predict(X)
-
-        explanations = [explain_prediction(row) for _, row in df.iterrows()]
-        df["Explanation_Binary"] = [e[0] for e in explanations]
-        df["Explanation_Multi"] = [e[1] for e in explanations]
+        df = load_raw_cached(path, limit, from_end=True)
+        df = predict_frame(df, path, NETWORK_MODELS_PATH)
 
         return df.to_dict(orient="records")
 
@@ -1,103 +1,64 @@
 # network_anomaly/main_network.py
 
-import time
-import csv
 import os
+import sys
 from datetime import datetime
 from utils_network import detect_new_ips, detect_port_scan
-import joblib
-import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from shared.ml.flat_forest import score_connections
+from shared.net.connection_features import ConnectionMonitor
+from shared.logs.log_store import open_log_store, NETWORK_LOG_SCHEMA
+from shared.logs.log_writer import BatchedLogWriter
+from shared.host.scheduler import Scheduler
 
 LOG_FILE = 'data/network_log.csv'
+log_store = open_log_store(LOG_FILE, NETWORK_LOG_SCHEMA)
+log_writer = None
 seen_ips = set()
+MONITOR_INTERVAL = 5  # seconds
+STATS_INTERVAL = 300  # seconds
 
 def init_csv():
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, mode="w", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=[
-                "timestamp", "new_ip_detected", "port_scan_detected",
-                "model_prediction", "model_class"
-            ])
-            writer.writeheader()
+    global log_writer
+    log_store.init()
+    log_writer = BatchedLogWriter(log_store, flush_interval=1.0, batch_size=100)
 
 def log_data(data):
-    with open(LOG_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=data.keys())
-        writer.writerow(data)
+    log_writer.enqueue(data)
 
-def main_loop():
-    init_csv()
-    binary_model = joblib.load("network_anomaly/models/binary_model.pkl")
-    multi_model = joblib.load("network_anomaly/models/multiclass_model.pkl")
+def monitor_once(connection_monitor):
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_ip_detected = detect_new_ips(seen_ips)
+        port_scan_detected = detect_port_scan()
 
-    print("🌐 Starting NETWORK anomaly detection loop...")
-    while True:
-        try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            new_ip_detected = detect_new_ips(seen_ips)
-            port_scan_detected = detect_port_scan()
+        # Score connections opened since the last cycle (KDD features from the live socket table)
+        binary_pred, multi_pred = score_connections(connection_monitor.poll(), "network_anomaly/models")
 
-            sample = pd.DataFrame([{
-                "duration": 0,
-                "protocol_type": 1,
-                "service": 1,
-                "flag": 1,
-                "src_bytes": 500,
-                "dst_bytes": 400,
-                "land": 0,
-                "wrong_fragment": 0,
-                "urgent": 0,
-                "hot": 0,
-                "num_failed_logins": 0,
-                "logged_in": 1,
-                "num_compromised": 0,
-                "root_shell": 0,
-                "su_attempted": 0,
-                "num_root": 0,
-                "num_file_creations": 0,
-                "num_shells": 0,
-                "num_access_files": 0,
-                "num_outbound_cmds": 0,
-                "is_host_login": 0,
-                "is_guest_login": 0,
-                "count": 1,
-                "srv_count": 1,
-                "serror_rate": 0,
-                "srv_serror_rate": 0,
-                "rerror_rate": 0,
-                "srv_rerror_rate": 0,
-                "same_srv_rate": 1,
-                "diff_srv_rate": 0,
-                "srv_diff_host_rate": 0,
-                "dst_host_count": 1,
-                "dst_host_srv_count": 1,
-                "dst_host_same_srv_rate": 1,
-                "dst_host_diff_srv_rate": 0,
-                "dst_host_same_src_port_rate": 1,
-                "dst_host_srv_diff_host_rate": 0,
-                "dst_host_serror_rate": 0,
-                "dst_host_srv_serror_rate": 0,
-                "dst_host_rerror_rate": 0,
-                "dst_host_srv_rerror_rate": 0
-            }])
+        log_data({
+            "timestamp": timestamp,
+            "new_ip_detected": ", ".join(new_ip_detected) if new_ip_detected else "None",
+            "port_scan_detected": port_scan_detected if port_scan_detected else "None",
+            "model_prediction": binary_pred,
+            "model_class": multi_pred
+        })
 
-            binary_pred = int(binary_model.predict(sample)[0])
-            multi_pred = str(multi_model.predict(sample)[0])
+    except Exception as e:
+        print("⚠️ NETWORK Monitoring Error:", e)
 
-            log_data({
-                "timestamp": timestamp,
-                "new_ip_detected": ", ".join(new_ip_detected) if new_ip_detected else "None",
-                "port_scan_detected": port_scan_detected if port_scan_detected else "None",
-                "model_prediction": binary_pred,
-                "model_class": multi_pred
-            })
-
-        except Exception as e:
-            print("⚠️ NETWORK Monitoring Error:", e)
+def main_loop():
+    init_csv()
+    connection_monitor = ConnectionMonitor()
 
-        time.sleep(5)
+    print("🌐 Starting NETWORK anomaly detection loop...")
+    scheduler = Scheduler()
+    scheduler.every(MONITOR_INTERVAL, lambda: monitor_once(connection_monitor), name="monitor")
+    scheduler.every(STATS_INTERVAL, scheduler.print_stats, name="stats", delay=STATS_INTERVAL)
+    scheduler.run()
 
 if __name__ == "__main__":
     main_loop()
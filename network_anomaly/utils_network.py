@@ -1,12 +1,20 @@
 # utils.py
 
+import os
+import sys
 import psutil
-from collections import defaultdict
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from shared.net.port_scan import PortScanDetector, PortScanMonitor
 
 # Globals
 _seen_ips = set()
-_port_scan_tracker = defaultdict(int)
 PORT_THRESHOLD = 10
+PORT_SCAN_WINDOW = 60  # seconds
+_port_scan_monitor = PortScanMonitor(PortScanDetector(window_seconds=PORT_SCAN_WINDOW, port_threshold=PORT_THRESHOLD))
 
 def detect_new_ips():
     global _seen_ips
@@ -22,17 +30,4 @@ def detect_new_ips():
     return new_ips
 
 def detect_port_scan():
-    global _port_scan_tracker
-    suspicious_ips = []
-
-    for conn in psutil.net_connections(kind='inet'):
-        if conn.raddr:
-            ip = conn.raddr.ip
-            _port_scan_tracker[ip] += 1
-
-    for ip, count in list(_port_scan_tracker.items()):
-        if count > PORT_THRESHOLD:
-            suspicious_ips.append(f"{ip} (Ports hit: {count})")
-            del _port_scan_tracker[ip]
-
-    return suspicious_ips
+    return [f"{ip} (Ports hit: {count})" for ip, count in _port_scan_monitor.poll().items()]
@@ -1,31 +1,52 @@
-from flask import Flask, render_template, send_file
-import pandas as pd
+from flask import Flask, Response, render_template, jsonify, stream_with_context
 import os
+import sys
 import win32evtlog
 from utils_server import get_top_apps
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+from shared.logs.metrics_ring import read_metrics
+from shared.logs.live_feed import get_live_feed
+from shared.llm.explanation_worker import ExplanationIndex, resolve_pending, resolved_csv
+
 app = Flask(__name__)
 SERVER_LOG_PATH = "../data/log.csv"
+explanation_index = ExplanationIndex("../data/llm_logs.jsonl")
+METRICS_WINDOW = 500
+EXPLANATIONS_LIMIT = 100
+
 
 
+def metrics_from_rows(rows):
+    return {
+        "timestamp": [row["timestamp"] for row in rows],
+        "cpu": [row["cpu"] for row in rows],
+        "memory": [row["memory"] for row in rows],
+        "disk": [row["disk"] for row in rows]
+    }
 
 @app.route("/")
 def dashboard():
     try:
-        df = pd.read_csv(SERVER_LOG_PATH)
+        store = open_log_store(SERVER_LOG_PATH, SERVER_LOG_SCHEMA)
+        # Chart series come from the collector's shared-memory ring when it is running
+        metrics = read_metrics(SERVER_LOG_PATH, METRICS_WINDOW)
+        rows = store.tail(1 if metrics is not None else METRICS_WINDOW)
+        last = rows[-1]
 
-        explanations = df[df["anomaly"] == 1].sort_values("timestamp", ascending=False).to_dict(orient="records")
+        explanations = resolve_pending(reversed(store.tail(EXPLANATIONS_LIMIT, where={"anomaly": 1})),
+                                       index=explanation_index)
         top_apps = {
-            "cpu": {"name": df.iloc[-1]["top_app_name"], "value": df.iloc[-1]["cpu"]},
-            "memory": {"name": df.iloc[-1]["top_app_name"], "value": df.iloc[-1]["memory"]},
-            "disk": {"name": df.iloc[-1]["top_app_name"], "value": df.iloc[-1]["disk"]}
-        }
-        metrics = {
-            "timestamp": df["timestamp"].tolist(),
-            "cpu": df["cpu"].tolist(),
-            "memory": df["memory"].tolist(),
-            "disk": df["disk"].tolist()
+            "cpu": {"name": last["top_app_name"], "value": last["cpu"]},
+            "memory": {"name": last["top_app_name"], "value": last["memory"]},
+            "disk": {"name": last["top_app_name"], "value": last["disk"]}
         }
+        if metrics is None:
+            metrics = metrics_from_rows(rows)
 
         event_logs = get_event_logs()
 
@@ -42,9 +63,27 @@ def dashboard():
         print("Error rendering dashboard:", e)
         return f"Error loading dashboard: {e}"
 
+@app.route("/api/metrics")
+def metrics_series():
+    metrics = read_metrics(SERVER_LOG_PATH, METRICS_WINDOW)
+    if metrics is None:
+        metrics = metrics_from_rows(open_log_store(SERVER_LOG_PATH, SERVER_LOG_SCHEMA).tail(METRICS_WINDOW))
+    return jsonify(metrics)
+
+@app.route("/api/stream")
+def live_stream():
+    """Server-Sent Events: new metric points, anomalies and explanations as they are logged"""
+    subscription = get_live_feed(SERVER_LOG_PATH, index=explanation_index).subscribe()
+    return Response(stream_with_context(subscription.stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route("/download/log.csv")
 def download_log():
-    return send_file(SERVER_LOG_PATH, as_attachment=True)
+    """The log with explanations that have arrived since the row was written filled in"""
+    if not os.path.exists(SERVER_LOG_PATH):
+        return "Log not found", 404
+    return Response(stream_with_context(resolved_csv(SERVER_LOG_PATH, index=explanation_index)), mimetype="text/csv",
+                    headers={"Content-Disposition": "attachment; filename=log.csv"})
 
 def get_event_logs(max_logs=10):
     logs = []
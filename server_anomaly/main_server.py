@@ -1,8 +1,6 @@
 # server_anomaly/main_server.py
 
 import psutil
-import time
-import csv
 import os
 import sys
 from datetime import datetime
@@ -14,80 +12,81 @@ if project_root not in sys.path:
 
 # ✅ Correct imports after path fix
 from utils_server import detect_anomaly, get_top_apps
-from shared.llm.llm_utils import explain_anomaly_via_llm
+from shared.llm.explanation_worker import ExplanationWorker
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+from shared.logs.log_writer import BatchedLogWriter
+from shared.host.cpu_monitor import CpuMonitor
+from shared.host.scheduler import Scheduler
+from shared.host.system_anomaly import top_app_metric
 
 LOG_FILE = 'data/server_log.csv'
+log_store = open_log_store(LOG_FILE, SERVER_LOG_SCHEMA)
+log_writer = None
+CPU_SAMPLE_INTERVAL = 0.1  # seconds
+MONITOR_INTERVAL = 5  # seconds
+STATS_INTERVAL = 300  # seconds
 
 def init_csv():
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, mode="w", newline="") as file:
-            writer = csv.DictWriter(file, fieldnames=[
-                "timestamp", "cpu", "memory", "disk", "anomaly",
-                "anomaly_type", "severity", "top_app_name", "explanation", "model_prediction", "model_class"
-
-            ])
-            writer.writeheader()
+    global log_writer
+    log_store.init()
+    log_writer = BatchedLogWriter(log_store, flush_interval=1.0, batch_size=100)
 
 def log_data(data):
-    with open(LOG_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=data.keys())
-        writer.writerow(data)
-
-def main_loop():
-    init_csv()
-    print("🖥️ Starting SERVER anomaly detection loop...")
-
-    while True:
-        try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cpu = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory().percent
-            disk = psutil.disk_usage('/').percent
+    log_writer.enqueue(data)
 
-            anomaly, anomaly_type, severity = detect_anomaly(cpu, memory, disk)
+def monitor_once(cpu_monitor, explanation_worker):
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Busiest second since the last run, sampled every CPU_SAMPLE_INTERVAL without blocking
+        _, cpu = cpu_monitor.take()
+        memory = psutil.virtual_memory().percent
+        disk = psutil.disk_usage('/').percent
 
-            top_apps = get_top_apps()
-            metric_type = "memory"
-            if "CPU" in str(anomaly_type):
-                metric_type = "cpu"
-            elif "Disk" in str(anomaly_type):
-                metric_type = "disk"
+        anomaly, anomaly_type, severity = detect_anomaly(cpu, memory, disk)
 
-            top_app_data = top_apps.get(metric_type, {})
-            top_app_name = top_app_data.get("name", "None")
+        top_apps = get_top_apps()
+        top_app_data = top_apps.get(top_app_metric(anomaly_type), {})
+        top_app_name = top_app_data.get("name", "None")
 
-            explanation = ""
-            if anomaly:
-                row = {
-                    "cpu": cpu,
-                    "memory": memory,
-                    "disk": disk,
-                    "anomaly_type": anomaly_type,
-                    "top_app_name": top_app_name
-                }
-                explanation = explain_anomaly_via_llm(row)
-
-            log_data({
-                "timestamp": timestamp,
+        explanation = ""
+        if anomaly:
+            row = {
                 "cpu": cpu,
                 "memory": memory,
                 "disk": disk,
-                "anomaly": int(anomaly),
-                "anomaly_type": anomaly_type if anomaly else "None",
-                "severity": severity if anomaly else "None",
-                "top_app_name": top_app_name,
-                "explanation": explanation,
-                "model_prediction": 0,  # or actual prediction if available
-                "model_class": "normal"  # or actual class if integrated
-            })
-
+                "anomaly_type": anomaly_type,
+                "top_app_name": top_app_name
+            }
+            explanation = explanation_worker.submit(row, timestamp)
+
+        log_data({
+            "timestamp": timestamp,
+            "cpu": cpu,
+            "memory": memory,
+            "disk": disk,
+            "anomaly": int(anomaly),
+            "anomaly_type": anomaly_type if anomaly else "None",
+            "severity": severity if anomaly else "None",
+            "top_app_name": top_app_name,
+            "explanation": explanation,
+            "model_prediction": 0,  # or actual prediction if available
+            "model_class": "normal"  # or actual class if integrated
+        })
+
+    except Exception as e:
+        print("⚠️ SERVER Monitoring Error:", e)
 
-        except Exception as e:
-            print("⚠️ SERVER Monitoring Error:", e)
+def main_loop():
+    init_csv()
+    explanation_worker = ExplanationWorker()
+    cpu_monitor = CpuMonitor()
+    print("🖥️ Starting SERVER anomaly detection loop...")
 
-        time.sleep(5)
+    scheduler = Scheduler()
+    scheduler.every(CPU_SAMPLE_INTERVAL, cpu_monitor.sample, name="cpu")
+    scheduler.every(MONITOR_INTERVAL, lambda: monitor_once(cpu_monitor, explanation_worker), name="monitor", delay=1.0)
+    scheduler.every(STATS_INTERVAL, scheduler.print_stats, name="stats", delay=STATS_INTERVAL)
+    scheduler.run()
 
 if __name__ == "__main__":
     main_loop()
@@ -0,0 +1,69 @@
+# shared/agent/agent.py
+
+from shared.agent.collectors import Tick
+from shared.host.scheduler import Scheduler
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA, NETWORK_LOG_SCHEMA
+from shared.logs.log_writer import BatchedLogWriter
+from shared.logs.metrics_ring import MetricsRing
+
+# Logged when no enabled collector produced a field
+ROW_DEFAULTS = {
+    "cpu": 0.0, "memory": 0.0, "disk": 0.0, "anomaly": 0, "model_prediction": 0, "explanation": "",
+}
+OUTPUT_SCHEMAS = {"server": SERVER_LOG_SCHEMA, "network": NETWORK_LOG_SCHEMA}
+
+
+class Agent:
+    """Runs a set of collectors in one process and logs their rows.
+
+    Every ``interval`` seconds the agent opens a Tick, runs each collector
+    against it (shared reads such as the socket table happen once per tick)
+    and enqueues the tick's rows to the log of each configured output.
+    Collectors with a ``sample_interval`` are also sampled between ticks on
+    the same scheduler.
+    """
+
+    def __init__(self, collectors, outputs, interval=5, stats_interval=300):
+        self.collectors = collectors
+        self.interval = interval
+        self.stats_interval = stats_interval
+        self.writers = {}
+        for name, path in outputs.items():
+            store = open_log_store(path, OUTPUT_SCHEMAS[name])
+            store.init()
+            self.writers[name] = BatchedLogWriter(store, flush_interval=1.0, batch_size=100)
+        # Server rows are also published to shared memory for the dashboards' charts
+        self.metrics_ring = MetricsRing.create(outputs["server"]) if "server" in outputs else None
+        self.scheduler = Scheduler()
+
+    def tick(self, ts=None):
+        tick = Tick(ts)
+        for collector in self.collectors:
+            try:
+                collector.collect(tick)
+            except Exception as e:
+                print(f"⚠️ Error in {collector.name} collector:", e)
+        for name, writer in self.writers.items():
+            schema = OUTPUT_SCHEMAS[name]
+            row = {field: ROW_DEFAULTS.get(field, "None") for field in schema}
+            row.update(tick.rows[name])
+            row["timestamp"] = tick.timestamp
+            writer.enqueue(row)
+            if name == "server" and self.metrics_ring is not None:
+                self.metrics_ring.append(row)
+        return tick
+
+    def run(self, duration=None):
+        for collector in self.collectors:
+            if collector.sample_interval:
+                self.scheduler.every(collector.sample_interval, collector.sample, name=collector.name)
+        # The first tick waits one second so CPU has a full burst window to report
+        self.scheduler.every(self.interval, self.tick, name="tick", delay=1.0)
+        if self.stats_interval:
+            self.scheduler.every(self.stats_interval, self.scheduler.print_stats, name="stats",
+                                 delay=self.stats_interval)
+        try:
+            self.scheduler.run(duration)
+        finally:
+            for writer in self.writers.values():
+                writer.flush()
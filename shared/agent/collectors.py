@@ -0,0 +1,170 @@
+# shared/agent/collectors.py
+
+import time
+import socket
+import psutil
+from shared.host.cpu_monitor import CpuMonitor
+from shared.host.process_table import get_top_apps
+from shared.host.system_anomaly import SystemAnomalyDetector, top_app_metric
+from shared.ml.flat_forest import score_connections
+from shared.net.connection_features import ConnectionFeatureExtractor, ConnectionTracker, snapshot_connections
+from shared.net.port_scan import PortScanDetector
+
+
+class Tick:
+    """Everything collected in one agent run.
+
+    System reads go through ``shared()``, so each one happens at most once
+    per tick however many collectors need it. Collectors fill in the output
+    rows (``rows["server"]``, ``rows["network"]``) that the agent then logs.
+    """
+
+    def __init__(self, ts=None):
+        self.ts = time.time() if ts is None else ts
+        self.timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.ts))
+        self.rows = {"server": {}, "network": {}}
+        self._shared = {}
+
+    def shared(self, key, read):
+        if key not in self._shared:
+            self._shared[key] = read()
+        return self._shared[key]
+
+    @property
+    def connections(self):
+        return self.shared("connections", snapshot_connections)
+
+    @property
+    def interfaces(self):
+        return self.shared("interfaces", psutil.net_if_addrs)
+
+
+class Collector:
+    """Agent plugin: ``collect(tick)`` adds fields to the tick's rows.
+
+    Collectors run in the order given to the agent, so later ones can read
+    what earlier ones wrote. A collector that needs finer-grained sampling
+    between ticks sets ``sample_interval`` and implements ``sample()``.
+    """
+
+    name = "collector"
+    sample_interval = None
+
+    def sample(self):
+        pass
+
+    def collect(self, tick):
+        raise NotImplementedError
+
+
+class SystemCollector(Collector):
+    """CPU (busiest second since the last tick), memory and disk usage, scored against the host's baselines"""
+
+    name = "system"
+    sample_interval = 0.1
+
+    def __init__(self, baseline_state=None):
+        self.cpu_monitor = CpuMonitor()
+        self.detector = SystemAnomalyDetector(baseline_state)
+
+    def sample(self):
+        self.cpu_monitor.sample()
+
+    def collect(self, tick):
+        _, cpu = self.cpu_monitor.take()
+        memory = psutil.virtual_memory().percent
+        disk = psutil.disk_usage('/').percent
+        anomaly, anomaly_type, severity = self.detector.detect(cpu, memory, disk, tick.ts)
+        tick.rows["server"].update({
+            "cpu": cpu,
+            "memory": memory,
+            "disk": disk,
+            "anomaly": int(anomaly),
+            "anomaly_type": anomaly_type if anomaly else "None",
+            "severity": severity if anomaly else "None",
+        })
+
+
+class ProcessCollector(Collector):
+    """Names the top process for the metric behind the anomaly (memory when there is none)"""
+
+    name = "processes"
+
+    def collect(self, tick):
+        top_apps = get_top_apps()
+        metric = top_app_metric(tick.rows["server"].get("anomaly_type"))
+        tick.rows["server"]["top_app_name"] = top_apps.get(metric, {}).get("name", "None")
+
+
+class ConnectionCollector(Collector):
+    """New connections from one socket-table scan, scored by the models and fed to the port-scan detector"""
+
+    name = "connections"
+
+    def __init__(self, models_dir="network_anomaly/models", port_scan_detector=None):
+        self.models_dir = models_dir
+        self.tracker = ConnectionTracker()
+        self.extractor = ConnectionFeatureExtractor()
+        self.port_scan_detector = port_scan_detector or PortScanDetector()
+
+    def collect(self, tick):
+        new = self.tracker.diff(tick.connections, tick.ts)
+        binary_pred, multi_pred = score_connections(self.extractor.frame(new), self.models_dir)
+        self.port_scan_detector.add_connections(new)
+        scanners = self.port_scan_detector.pop_alerts(tick.ts)
+        if scanners:
+            print(f"🚨 Port scan activity from: {list(scanners)}")
+
+        prediction = {"model_prediction": binary_pred, "model_class": multi_pred}
+        tick.rows["server"].update(prediction)
+        tick.rows["network"].update(prediction)
+        tick.rows["network"]["port_scan_detected"] = (
+            ", ".join(f"{ip} (Ports hit: {count})" for ip, count in scanners.items()) if scanners else "None"
+        )
+
+
+class InterfaceCollector(Collector):
+    """IPv4 addresses that appeared on a local interface since the agent started"""
+
+    name = "interfaces"
+
+    def __init__(self):
+        self.seen_ips = set()
+
+    def collect(self, tick):
+        new_ips = []
+        for addrs in tick.interfaces.values():
+            for addr in addrs:
+                if addr.family == socket.AF_INET and addr.address not in self.seen_ips:
+                    new_ips.append(addr.address)
+                    self.seen_ips.add(addr.address)
+        if new_ips:
+            print(f"🆕 New IP(s) detected: {new_ips}")
+        tick.rows["network"]["new_ip_detected"] = ", ".join(new_ips) if new_ips else "None"
+
+
+class ExplanationCollector(Collector):
+    """Queues an LLM explanation for server anomalies; runs after the collectors it explains"""
+
+    name = "explanations"
+
+    def __init__(self, worker):
+        self.worker = worker
+
+    def collect(self, tick):
+        row = tick.rows["server"]
+        explanation = ""
+        if row.get("anomaly"):
+            explanation = self.worker.submit({key: row.get(key) for key in
+                                              ("cpu", "memory", "disk", "anomaly_type", "top_app_name")},
+                                             tick.timestamp)
+        row["explanation"] = explanation
+
+
+# Name -> factory, in the order the agent runs them
+COLLECTORS = {
+    "system": SystemCollector,
+    "processes": ProcessCollector,
+    "connections": ConnectionCollector,
+    "interfaces": InterfaceCollector,
+}
@@ -1,6 +1,7 @@
 import csv
 import os
 from datetime import datetime
+from shared.logs.log_store import append_atomic, format_csv_rows
 
 def init_log_file(file_path, fieldnames):
     """Initialize log file with headers"""
@@ -12,10 +13,8 @@ def init_log_file(file_path, fieldnames):
             writer.writeheader()
 
 def log_data(file_path, data):
-    """Log data to CSV file"""
-    with open(file_path, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=data.keys())
-        writer.writerow(data)
+    """Log data to CSV file as a single atomic append"""
+    append_atomic(file_path, format_csv_rows(list(data.keys()), [data]))
 
 def get_current_timestamp():
     """Get formatted current timestamp"""
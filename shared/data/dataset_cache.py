@@ -0,0 +1,145 @@
+# shared/data/dataset_cache.py
+
+import os
+import json
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from shared.data.kdd_loader import load_kdd, features, COLUMNS, FEATURE_COLUMNS, RATE_COLUMNS
+from shared.ml.model_registry import file_sha256
+
+CACHE_DIR = "data/cache"
+CACHE_FORMAT = 1
+
+_fingerprint_lock = threading.Lock()
+
+
+def file_fingerprint(path, cache_dir=CACHE_DIR):
+    """Content hash of ``path``; only re-hashed when its size or mtime changes"""
+    memo_path = os.path.join(cache_dir, "fingerprints.json")
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    with _fingerprint_lock:
+        try:
+            with open(memo_path, "r") as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        known = memo.get(key)
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime:
+            return known["sha256"]
+
+        sha256 = file_sha256(path)
+        memo[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256}
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = memo_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(memo, f, indent=2)
+        os.replace(tmp_path, memo_path)
+        return sha256
+
+
+def _commit_dir(tmp_dir, final_dir):
+    """Publish a fully written cache entry; a concurrent writer may have won the race"""
+    try:
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write_frame(df, entry_dir):
+    tmp_dir = entry_dir + f".tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    meta = {"format": CACHE_FORMAT, "rows": len(df), "columns": {}}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp_dir, col + ".npy"), values.cat.codes.to_numpy())
+            meta["columns"][col] = {"kind": "category", "categories": [str(c) for c in values.cat.categories]}
+        else:
+            np.save(os.path.join(tmp_dir, col + ".npy"), values.to_numpy())
+            meta["columns"][col] = {"kind": "numeric"}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    _commit_dir(tmp_dir, entry_dir)
+
+
+def _read_frame(entry_dir, mmap=True):
+    with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+    data = {}
+    for col, info in meta["columns"].items():
+        values = np.load(os.path.join(entry_dir, col + ".npy"), mmap_mode="r" if mmap else None)
+        if info["kind"] == "category":
+            values = pd.Categorical.from_codes(np.asarray(values), categories=info["categories"])
+        data[col] = values
+    return pd.DataFrame(data)
+
+
+def load_kdd_cached(path, drop_unknown=True, cache_dir=CACHE_DIR, mmap=True, chunksize=None):
+    """``load_kdd`` backed by a binary cache keyed on the file's content hash"""
+    sha256 = file_fingerprint(path, cache_dir)
+    variant = "known" if drop_unknown else "all"
+    entry_dir = os.path.join(cache_dir, f"{sha256[:16]}-v{CACHE_FORMAT}-{variant}")
+    if os.path.exists(os.path.join(entry_dir, "meta.json")):
+        return _read_frame(entry_dir, mmap)
+
+    print(f"🗃️ Parsing {os.path.basename(path)} into the dataset cache...")
+    df = load_kdd(path, chunksize=chunksize, drop_unknown=drop_unknown)
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_frame(df, entry_dir)
+    return df
+
+
+def load_raw_cached(path, limit=None, from_end=False, cache_dir=CACHE_DIR):
+    """First (or last) ``limit`` rows of a dataset file with just the original 43 columns.
+
+    Rates are widened back to float64 and rounded so they display as in the file.
+    """
+    df = load_kdd_cached(path, drop_unknown=False, cache_dir=cache_dir)[COLUMNS]
+    if limit is not None:
+        df = df.tail(limit) if from_end else df.head(limit)
+    return df.astype({col: "float64" for col in RATE_COLUMNS}).round({col: 2 for col in RATE_COLUMNS})
+
+
+def known_rows(path, cache_dir=CACHE_DIR):
+    """Mask over every row of a file selecting the rows ``drop_unknown`` keeps"""
+    df = load_kdd_cached(path, drop_unknown=False, cache_dir=cache_dir)
+    return (df["attack_multi"] != "unknown").to_numpy()
+
+
+def load_features_cached(path, encoder, drop_unknown=True, cache_dir=CACHE_DIR):
+    """Encoded float32 feature matrix and labels, memory-mapped from the cache.
+
+    Keyed on the file hash and the encoder version, so retraining with a new
+    encoding produces a new entry instead of serving stale codes.
+    Returns ``(X, y_binary, y_multi)``: X is a DataFrame over the memory-mapped
+    matrix (named columns, as the models expect), the labels are NumPy arrays.
+    """
+    sha256 = file_fingerprint(path, cache_dir)
+    variant = "known" if drop_unknown else "all"
+    entry_dir = os.path.join(cache_dir, f"{sha256[:16]}-v{CACHE_FORMAT}-{variant}-X-{encoder.version}")
+
+    if not os.path.exists(os.path.join(entry_dir, "meta.json")):
+        df = encoder.transform(load_kdd_cached(path, drop_unknown, cache_dir, mmap=False))
+        X = np.ascontiguousarray(features(df).to_numpy(dtype=np.float32))
+        y_multi = df["attack_multi"].astype(str).to_numpy()
+        classes, y_multi_codes = np.unique(y_multi, return_inverse=True)
+
+        tmp_dir = entry_dir + f".tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        np.save(os.path.join(tmp_dir, "X.npy"), X)
+        np.save(os.path.join(tmp_dir, "y_binary.npy"), df["attack_binary"].to_numpy())
+        np.save(os.path.join(tmp_dir, "y_multi.npy"), y_multi_codes.astype(np.int8))
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"format": CACHE_FORMAT, "rows": len(X), "classes": classes.tolist(),
+                       "columns": list(features(df).columns)}, f)
+        _commit_dir(tmp_dir, entry_dir)
+
+    with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+        meta = json.load(f)
+    X = pd.DataFrame(np.load(os.path.join(entry_dir, "X.npy"), mmap_mode="r"), columns=FEATURE_COLUMNS, copy=False)
+    y_binary = np.load(os.path.join(entry_dir, "y_binary.npy"), mmap_mode="r")
+    y_multi = np.array(meta["classes"], dtype=object)[np.load(os.path.join(entry_dir, "y_multi.npy"))]
+    return X, y_binary, y_multi
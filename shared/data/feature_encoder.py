@@ -0,0 +1,99 @@
+# shared/data/feature_encoder.py
+
+import os
+import json
+import hashlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from shared.ml.model_registry import registry
+from shared.data.kdd_loader import CATEGORICAL_COLUMNS
+
+ENCODER_FILE = "feature_encoder.json"
+FORMAT_VERSION = 1
+
+
+class CategoricalEncoder:
+    """Fitted encoding for the KDD categorical columns.
+
+    Known categories get the same sorted codes a ``LabelEncoder`` fitted on the
+    training set would produce (0..n-1); anything unseen falls into an explicit
+    unknown bucket with code n, so old and new models agree on every known value.
+    """
+
+    def __init__(self, categories, created_at=None):
+        self.categories = {col: list(values) for col, values in categories.items()}
+        self.created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    def fit(cls, df, columns=CATEGORICAL_COLUMNS):
+        categories = {}
+        for col in columns:
+            categories[col] = sorted(str(v) for v in df[col].dropna().unique())
+        return cls(categories)
+
+    def unknown_code(self, col):
+        return len(self.categories[col])
+
+    @property
+    def version(self):
+        """Short content hash identifying this encoding"""
+        payload = json.dumps(self.categories, sort_keys=True).encode()
+        return hashlib.sha256(payload).hexdigest()[:12]
+
+    def transform(self, df, inplace=False):
+        """Encode categorical columns with a single vectorized lookup per column.
+
+        Columns that are already numeric are assumed to hold codes and are left as is.
+        """
+        if not inplace:
+            df = df.copy()
+        for col, values in self.categories.items():
+            if col not in df.columns or pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # Map the (few) categories once, then index the codes with the lookup table
+                lookup = np.array([self.encode_value(col, c) for c in df[col].cat.categories] + [len(values)],
+                                  dtype="int16")
+                df[col] = lookup[df[col].cat.codes.to_numpy()]
+                continue
+            codes = pd.Categorical(df[col].astype(str), categories=values).codes.astype("int16")
+            codes[codes < 0] = len(values)
+            df[col] = codes
+        return df
+
+    def encode_value(self, col, value):
+        """Encode a single raw value (used for one-off records)"""
+        try:
+            return self.categories[col].index(str(value))
+        except ValueError:
+            return self.unknown_code(col)
+
+    def to_dict(self):
+        return {
+            "format_version": FORMAT_VERSION,
+            "version": self.version,
+            "created_at": self.created_at,
+            "categories": self.categories,
+        }
+
+    def save(self, path):
+        """Atomically write the encoder as JSON"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported encoder format in {path}: {data.get('format_version')}")
+        return cls(data["categories"], created_at=data.get("created_at"))
+
+
+def get_encoder(models_dir):
+    """Process-wide cached encoder stored next to the models in ``models_dir``"""
+    return registry.get(os.path.join(models_dir, ENCODER_FILE), loader=CategoricalEncoder.load)
@@ -0,0 +1,123 @@
+# shared/data/kdd_loader.py
+
+import sys
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import psutil
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+COLUMNS = [
+    "duration", "protocol_type", "service", "flag", "src_bytes", "dst_bytes", "land",
+    "wrong_fragment", "urgent", "hot", "num_failed_logins", "logged_in",
+    "num_compromised", "root_shell", "su_attempted", "num_root", "num_file_creations",
+    "num_shells", "num_access_files", "num_outbound_cmds", "is_host_login",
+    "is_guest_login", "count", "srv_count", "serror_rate", "srv_serror_rate",
+    "rerror_rate", "srv_rerror_rate", "same_srv_rate", "diff_srv_rate", "srv_diff_host_rate",
+    "dst_host_count", "dst_host_srv_count", "dst_host_same_srv_rate",
+    "dst_host_diff_srv_rate", "dst_host_same_src_port_rate", "dst_host_srv_diff_host_rate",
+    "dst_host_serror_rate", "dst_host_srv_serror_rate", "dst_host_rerror_rate",
+    "dst_host_srv_rerror_rate", "attack", "last_flag"
+]
+LABEL_COLUMNS = ["attack", "last_flag"]
+FEATURE_COLUMNS = [c for c in COLUMNS if c not in LABEL_COLUMNS]
+CATEGORICAL_COLUMNS = ["protocol_type", "service", "flag"]
+
+# Smallest dtypes that hold the NSL-KDD value ranges; byte counters stay 64-bit
+FLAG_COLUMNS = ["land", "logged_in", "root_shell", "su_attempted", "is_host_login", "is_guest_login"]
+RATE_COLUMNS = [c for c in FEATURE_COLUMNS if c.endswith("_rate")]
+DTYPES = {col: "int32" for col in FEATURE_COLUMNS}
+DTYPES.update({col: "int8" for col in FLAG_COLUMNS})
+DTYPES.update({col: "float32" for col in RATE_COLUMNS})
+DTYPES.update({col: "category" for col in CATEGORICAL_COLUMNS})
+DTYPES.update({"src_bytes": "int64", "dst_bytes": "int64", "attack": "category", "last_flag": "int8"})
+
+ATTACK_CLASSES = {
+    "DOS": ["back", "land", "neptune", "pod", "smurf", "teardrop", "mailbomb", "apache2",
+            "processtable", "udpstorm"],
+    "PROBE": ["ipsweep", "nmap", "portsweep", "satan", "mscan", "saint"],
+    "R2L": ["ftp_write", "guess_passwd", "imap", "multihop", "phf", "spy", "warezclient",
+            "warezmaster", "xlock", "xsnoop", "sendmail", "snmpgetattack", "snmpguess"],
+    "U2R": ["buffer_overflow", "loadmodule", "perl", "rootkit", "xterm", "ps"],
+    "normal": ["normal"],
+}
+ATTACK_TO_CLASS = {name: cls for cls, names in ATTACK_CLASSES.items() for name in names}
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process so far"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1024
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / 1e6
+
+
+@contextmanager
+def timed_stage(name, report=None):
+    """Print (and optionally record in ``report``) wall time and peak memory of a stage"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    peak = peak_memory_mb()
+    print(f"⏱️ {name}: {elapsed:.2f}s, peak RSS {peak:.1f} MB")
+    if report is not None:
+        report[name] = {"seconds": round(elapsed, 3), "peak_rss_mb": round(peak, 1)}
+
+
+def _combine_chunks(chunks):
+    """Concatenate chunks without losing categorical dtypes"""
+    combined = {}
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            combined[col] = pd.Series(pd.api.types.union_categoricals([c[col] for c in chunks]))
+        else:
+            combined[col] = pd.Series(np.concatenate([c[col].to_numpy() for c in chunks]))
+    return pd.DataFrame(combined)
+
+
+def load_kdd(path, chunksize=None, drop_unknown=True):
+    """Read an NSL-KDD style file with compact dtypes and vectorized labels.
+
+    Adds ``attack_binary`` (0 normal / 1 attack, int8) and ``attack_multi``
+    (DOS / PROBE / R2L / U2R / normal, categorical). Rows whose attack name is
+    not in ATTACK_CLASSES are dropped unless ``drop_unknown`` is False, in which
+    case they are labelled "unknown". With ``chunksize`` the file is read and
+    filtered in pieces so peak memory stays near the size of the result.
+    """
+    reader = pd.read_csv(path, names=COLUMNS, dtype=DTYPES, chunksize=chunksize)
+    chunks = [reader] if chunksize is None else reader
+    labelled = [label_attacks(chunk, drop_unknown) for chunk in chunks]
+    df = labelled[0] if len(labelled) == 1 else _combine_chunks(labelled)
+    return df.reset_index(drop=True)
+
+
+def label_attacks(df, drop_unknown=True):
+    """Add binary/multiclass labels via a lookup table over the attack categories"""
+    attack = df["attack"]
+    if not isinstance(attack.dtype, pd.CategoricalDtype):
+        attack = attack.astype("category")
+    categories = attack.cat.categories
+    class_lookup = np.array([ATTACK_TO_CLASS.get(str(name).lower(), "unknown") for name in categories],
+                            dtype=object)
+    codes = attack.cat.codes.to_numpy()
+    multi = class_lookup[codes]
+
+    if drop_unknown:
+        keep = multi != "unknown"
+        df = df[keep]
+        multi = multi[keep]
+    df = df.copy()
+    df["attack_multi"] = pd.Categorical(multi)
+    df["attack_binary"] = (multi != "normal").astype("int8")
+    return df
+
+
+def features(df):
+    """Feature matrix (41 KDD columns) from a loaded/encoded frame"""
+    return df[FEATURE_COLUMNS]
@@ -0,0 +1,180 @@
+# shared/data/row_index.py
+
+import os
+import csv
+import threading
+import numpy as np
+import pandas as pd
+from shared.data.kdd_loader import COLUMNS, DTYPES
+from shared.data.dataset_cache import CACHE_DIR, file_fingerprint, load_kdd_cached
+
+BLOCK_SIZE = 1 << 20
+MAX_PAGE_LENGTH = 500
+FILTER_COLUMNS = ["protocol_type", "service", "flag", "attack", "attack_multi"]
+
+
+def _parse_value(col, value):
+    kind = DTYPES[col]
+    if kind == "category":
+        return value
+    if kind.startswith("float"):
+        return float(value)
+    return int(value)
+
+
+class RowIndex:
+    """Byte offset of every row in a dataset file, so single pages can be read with seeks.
+
+    The offsets are built once with a vectorized newline scan and saved as a
+    sidecar ``<hash>-rows.npy`` in the dataset cache, keyed on the file's
+    content hash; an edited file gets a new index automatically. Blank lines
+    are skipped so row numbers match ``load_kdd(..., drop_unknown=False)``.
+    """
+
+    def __init__(self, path, cache_dir=CACHE_DIR):
+        self.path = path
+        stat = os.stat(path)
+        self.signature = (stat.st_size, stat.st_mtime)
+        sha256 = file_fingerprint(path, cache_dir)
+        index_path = os.path.join(cache_dir, f"{sha256[:16]}-rows.npy")
+        try:
+            self.offsets = np.load(index_path, mmap_mode="r")
+        except (OSError, ValueError):
+            self.offsets = self._build()
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = index_path + f".tmp-{os.getpid()}.npy"
+            np.save(tmp_path, self.offsets)
+            os.replace(tmp_path, index_path)
+
+    def _build(self):
+        """(start, end) byte range of each non-empty line"""
+        newlines = []
+        position = 0
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(BLOCK_SIZE)
+                if not block:
+                    break
+                newlines.append(np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n")) + position)
+                position += len(block)
+        newlines = np.concatenate(newlines) if newlines else np.empty(0, dtype=np.int64)
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.concatenate((newlines, [position]))
+        keep = ends - starts > 1  # drops blank and lone "\r" lines
+        return np.column_stack((starts[keep], ends[keep])).astype(np.int64)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def is_stale(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return (stat.st_size, stat.st_mtime) != self.signature
+
+    def read_rows(self, positions):
+        """Rows at ``positions`` as dicts, in the order requested"""
+        positions = np.asarray(positions, dtype=np.int64)
+        rows = {}
+        with open(self.path, "rb") as f:
+            # Seek in file order, then hand back in the caller's order
+            for position in np.unique(positions):
+                start, end = self.offsets[position]
+                f.seek(start)
+                line = f.read(end - start).decode("utf-8").rstrip("\r")
+                values = next(csv.reader([line]))
+                rows[position] = {col: _parse_value(col, value) for col, value in zip(COLUMNS, values)}
+        return [dict(rows[position]) for position in positions]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_row_index(path):
+    """Process-wide index per dataset file, rebuilt when the file changes"""
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None or index.is_stale():
+            index = _indexes[key] = RowIndex(path)
+        return index
+
+
+def query_rows(path, start=0, length=10, search="", order_column=None, descending=False, filters=None):
+    """One page of a dataset, filtered and sorted without parsing the whole file.
+
+    Filtering and sorting use the memory-mapped columns from the dataset
+    cache; only the rows on the requested page are read from the text file.
+    ``filters`` maps a column in FILTER_COLUMNS (``attack_multi`` is the
+    attack class) to the value it must equal; ``search`` matches
+    case-insensitively against any of those columns.
+    Returns ``(total, filtered, rows)``.
+    """
+    index = get_row_index(path)
+    df = load_kdd_cached(path, drop_unknown=False)
+    total = len(df)
+    mask = np.ones(total, dtype=bool)
+
+    for col, value in (filters or {}).items():
+        if col in FILTER_COLUMNS and value:
+            mask &= (df[col] == value).to_numpy()
+
+    if search:
+        needle = search.lower()
+        matched = np.zeros(total, dtype=bool)
+        for col in FILTER_COLUMNS:
+            categories = df[col].cat.categories
+            hits = [c for c in categories if needle in str(c).lower()]
+            if hits:
+                matched |= df[col].isin(hits).to_numpy()
+        mask &= matched
+
+    positions = np.flatnonzero(mask)
+    if order_column in df.columns:
+        values = df[order_column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Categories are stored sorted, so codes order alphabetically
+            keys = values.cat.codes.to_numpy()[positions].astype(np.int64)
+        else:
+            keys = values.to_numpy()[positions]
+        order = np.argsort(-keys if descending else keys, kind="stable")
+        positions = positions[order]
+
+    page = positions[start:start + min(length, MAX_PAGE_LENGTH)]
+    rows = index.read_rows(page)
+    attack_class = df["attack_multi"].cat.categories[df["attack_multi"].cat.codes.to_numpy()[page]]
+    for position, row, cls in zip(page, rows, attack_class):
+        row["row"] = int(position)
+        row["attack_class"] = str(cls)
+    return total, len(positions), rows
+
+
+def datatables_page(path, params):
+    """Answer a DataTables server-side processing request (``params`` = request.args).
+
+    Besides the standard draw/start/length/search/order parameters, the
+    ``attack_class`` and ``service`` parameters filter on those columns.
+    """
+    draw = int(params.get("draw", 0))
+    start = max(0, int(params.get("start", 0)))
+    length = int(params.get("length", 10))
+    if length < 0:  # DataTables sends -1 for "All"
+        length = MAX_PAGE_LENGTH
+
+    order_column = None
+    order_index = params.get("order[0][column]")
+    if order_index is not None:
+        order_column = params.get(f"columns[{order_index}][data]")
+    if order_column == "attack_class":
+        order_column = "attack_multi"
+
+    total, filtered, rows = query_rows(
+        path, start, length,
+        search=params.get("search[value]", "").strip(),
+        order_column=order_column,
+        descending=params.get("order[0][dir]") == "desc",
+        filters={"attack_multi": params.get("attack_class"), "service": params.get("service")},
+    )
+    return {"draw": draw, "recordsTotal": total, "recordsFiltered": filtered, "data": rows}
@@ -0,0 +1,227 @@
+# shared/host/baselines.py
+
+import os
+import time
+import argparse
+import numpy as np
+
+STATE_FORMAT = 1
+ROBUST_SCALE = 1.4826  # MAD -> standard deviation for normally distributed data
+
+
+class BaselineStore:
+    """Streaming baselines for many metric series, O(1) work and fixed memory per series.
+
+    Each series keeps an exponentially weighted mean and variance, a
+    streaming median and median absolute deviation (nudged one step towards
+    every sample), and optionally a slower mean/variance per time-of-day
+    bucket. ``score_update()`` scores a batch of samples against the
+    baselines *before* folding them in and returns, per sample, the z-score
+    closest to zero among the EWMA, the robust (median/MAD) and, once its
+    bucket has ``seasonal_warmup`` samples, the time-of-day view: a spike
+    has to stand out under all of them, and a peak that recurs at the same
+    time every day is explained away. Scores are NaN until a series has
+    seen ``warmup`` samples. Samples beyond ``clip_z`` are clipped and
+    folded in with ``outlier_weight`` of the usual weight, so a sustained
+    shift is still learnt, but over minutes rather than within a few
+    samples.
+
+    All state lives in a handful of numpy arrays indexed by series, grown by
+    doubling, and round-trips through ``save()``/``load()`` so a restarted
+    collector keeps its baselines.
+    """
+
+    def __init__(self, alpha=0.02, seasonal_buckets=24, seasonal_alpha=0.01, warmup=30,
+                 seasonal_warmup=360, clip_z=3.0, outlier_weight=0.1, capacity=64):
+        self.alpha = alpha
+        self.seasonal_buckets = seasonal_buckets
+        self.seasonal_alpha = seasonal_alpha
+        self.warmup = warmup
+        self.seasonal_warmup = seasonal_warmup
+        self.clip_z = clip_z
+        self.outlier_weight = outlier_weight
+        self.keys = []
+        self._index = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        buckets = max(self.seasonal_buckets, 1)
+        self.count = np.zeros(capacity, dtype=np.uint32)
+        self.mean = np.zeros(capacity)
+        self.var = np.zeros(capacity)
+        self.median = np.zeros(capacity)
+        self.mad = np.zeros(capacity)
+        self.season_count = np.zeros((capacity, buckets), dtype=np.uint32)
+        self.season_mean = np.zeros((capacity, buckets))
+        self.season_var = np.zeros((capacity, buckets))
+
+    _ARRAYS = ("count", "mean", "var", "median", "mad", "season_count", "season_mean", "season_var")
+
+    def _grow(self, needed):
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        old = {name: getattr(self, name) for name in self._ARRAYS}
+        self._allocate(capacity)
+        for name, array in old.items():
+            getattr(self, name)[:len(array)] = array
+
+    def indices(self, keys):
+        """Row of each series key, adding unseen series"""
+        index = self._index
+        rows = np.empty(len(keys), dtype=np.intp)
+        for i, key in enumerate(keys):
+            row = index.get(key)
+            if row is None:
+                row = index[key] = len(self.keys)
+                self.keys.append(key)
+            rows[i] = row
+        self._grow(len(self.keys))
+        return rows
+
+    def _bucket(self, ts):
+        local = time.localtime(ts)
+        seconds = local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+        return seconds * self.seasonal_buckets // 86400
+
+    def score_update(self, keys, values, ts=None, min_scale=1.0):
+        """Scores of ``values`` (one per key) against their baselines, then fold them in.
+
+        ``min_scale`` (scalar or per key) floors the spread used for scoring,
+        so a series that has been flat does not turn every small wobble into
+        a huge z-score.
+        """
+        rows = self.indices(keys)
+        x = np.asarray(values, dtype=float)
+        floor = np.broadcast_to(np.asarray(min_scale, dtype=float), x.shape)
+        ts = time.time() if ts is None else ts
+        n = self.count[rows]
+
+        mean = self.mean[rows]
+        scale = np.maximum(np.sqrt(self.var[rows]), floor)
+        median = self.median[rows]
+        robust_scale = np.maximum(ROBUST_SCALE * self.mad[rows], floor)
+
+        z_ewma = (x - mean) / scale
+        z_robust = (x - median) / robust_scale
+        scores = np.where(np.abs(z_ewma) < np.abs(z_robust), z_ewma, z_robust)
+        if self.seasonal_buckets:
+            bucket = self._bucket(ts)
+            s_n = self.season_count[rows, bucket]
+            s_mean = self.season_mean[rows, bucket]
+            s_var = self.season_var[rows, bucket]
+            z_season = (x - s_mean) / np.maximum(np.sqrt(s_var), floor)
+            scores = np.where((s_n >= self.seasonal_warmup) & (np.abs(z_season) < np.abs(scores)), z_season, scores)
+        warm = n >= self.warmup
+        scores[~warm] = np.nan
+
+        # Clip outliers and fold them in with a reduced weight
+        limit = self.clip_z * scale
+        outlier = warm & (np.abs(x - mean) > limit)
+        xc = np.where(warm, np.clip(x, mean - limit, mean + limit), x)
+        first = n == 0
+        weight = np.where(outlier, self.outlier_weight, 1.0)
+
+        # EWMA mean/variance; the first samples are weighted as a plain average
+        a = np.maximum(self.alpha, 1.0 / (n + 1.0)) * weight
+        diff = xc - self.mean[rows]
+        self.mean[rows] = np.where(first, xc, self.mean[rows] + a * diff)
+        self.var[rows] = np.where(first, 0.0, (1 - a) * (self.var[rows] + a * diff * diff))
+
+        # Streaming median and MAD: step towards the sample by a fraction of the current spread
+        step = self.alpha * weight * robust_scale
+        new_median = np.where(first, xc, median + step * np.sign(xc - median))
+        deviation = np.abs(xc - new_median)
+        mad = self.mad[rows]
+        self.median[rows] = new_median
+        self.mad[rows] = np.where(first, 0.0, np.maximum(mad + step * np.sign(deviation - mad), 0.0))
+
+        if self.seasonal_buckets:
+            # Mean unclipped, so a recurring peak can be learnt; slowly, as it may be an anomaly
+            s_a = np.maximum(self.seasonal_alpha, 1.0 / (s_n + 1.0)) * weight
+            s_diff = x - s_mean
+            s_limit = self.clip_z * np.maximum(np.sqrt(s_var), floor)
+            s_clipped = np.clip(s_diff, -s_limit, s_limit)
+            self.season_mean[rows, bucket] = np.where(s_n == 0, x, s_mean + s_a * s_diff)
+            self.season_var[rows, bucket] = np.where(s_n == 0, 0.0, (1 - s_a) * (s_var + s_a * s_clipped * s_clipped))
+            self.season_count[rows, bucket] = np.minimum(s_n + 1, np.iinfo(np.uint32).max)
+
+        self.count[rows] = np.minimum(n + 1, np.iinfo(np.uint32).max)
+        return scores
+
+    def bytes_per_series(self):
+        return sum(getattr(self, name).itemsize * (getattr(self, name).size // len(self.count))
+                   for name in self._ARRAYS)
+
+    def memory_usage(self):
+        return sum(getattr(self, name).nbytes for name in self._ARRAYS)
+
+    def save(self, path):
+        """Write the state atomically (temp file + rename)"""
+        size = len(self.keys)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path,
+                 format=STATE_FORMAT,
+                 config=np.array([self.alpha, self.seasonal_buckets, self.seasonal_alpha, self.warmup,
+                                  self.seasonal_warmup, self.clip_z, self.outlier_weight]),
+                 keys=np.array(self.keys, dtype=str),
+                 **{name: getattr(self, name)[:size] for name in self._ARRAYS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Store restored from ``path``, or a fresh one if it is missing, unreadable or configured differently"""
+        store = cls(**kwargs)
+        if not os.path.exists(path):
+            return store
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["format"]) != STATE_FORMAT or int(data["config"][1]) != store.seasonal_buckets:
+                    print(f"⚠️ Baseline state in {path} does not match this configuration, starting fresh")
+                    return store
+                keys = data["keys"].tolist()
+                store.indices(keys)
+                for name in cls._ARRAYS:
+                    getattr(store, name)[:len(keys)] = data[name]
+        except Exception as e:
+            print(f"⚠️ Error loading baseline state from {path}:", e)
+            return cls(**kwargs)
+        return store
+
+
+def benchmark(series=5000, ticks=200):
+    store = BaselineStore()
+    keys = [f"host-{i // 3}/{('cpu', 'memory', 'disk')[i % 3]}" for i in range(series)]
+    rng = np.random.default_rng(0)
+    values = rng.normal(50, 5, size=(ticks, series))
+    start = time.perf_counter()
+    for tick in range(ticks):
+        store.score_update(keys, values[tick], ts=tick * 5.0)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {series} series x {ticks} ticks: {elapsed / ticks * 1000:.2f} ms per tick, "
+          f"{store.bytes_per_series()} bytes per series, {store.memory_usage() / 1e6:.1f} MB")
+
+    path = "/tmp/baselines-benchmark.npz"
+    start = time.perf_counter()
+    store.save(path)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    BaselineStore.load(path)
+    print(f"📦 State saved in {saved * 1000:.1f} ms, restored in {(time.perf_counter() - start) * 1000:.1f} ms")
+    os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming baselines")
+    parser.add_argument("--series", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+    benchmark(args.series, args.ticks)
+
+
+if __name__ == "__main__":
+    main()
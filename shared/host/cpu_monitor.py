@@ -0,0 +1,64 @@
+# shared/host/cpu_monitor.py
+
+import time
+from collections import deque
+import psutil
+
+
+def _busy_total(times):
+    """(busy, total) CPU seconds, counted the way psutil.cpu_percent does"""
+    total = sum(times)
+    # Linux already includes guest time in user/nice
+    total -= getattr(times, "guest", 0.0) + getattr(times, "guest_nice", 0.0)
+    busy = total - times.idle - getattr(times, "iowait", 0.0)
+    return busy, total
+
+
+def _percent(earlier, later):
+    busy = later[0] - earlier[0]
+    total = later[1] - earlier[1]
+    return round(min(100.0, max(0.0, busy / total * 100.0)), 1) if total > 0 else 0.0
+
+
+class CpuMonitor:
+    """System CPU usage from cpu_times deltas, without blocking.
+
+    ``sample()`` is meant to be scheduled at a short cadence (100 ms or so);
+    it tracks the busiest ``burst_window`` seconds seen since the last
+    ``take()``. ``take()`` returns ``(average, peak)`` for the period since the
+    previous ``take()``: the average over the whole period and the highest
+    rolling ``burst_window`` average, so a short burst between two reads is
+    not lost.
+    """
+
+    def __init__(self, burst_window=1.0, clock=time.monotonic, cpu_times=psutil.cpu_times):
+        self.burst_window = burst_window
+        self.clock = clock
+        self.cpu_times = cpu_times
+        first = self._read()
+        self._history = deque([first])
+        self._last_take = first
+        self._peak = None
+
+    def _read(self):
+        return (self.clock(),) + _busy_total(self.cpu_times())
+
+    def sample(self):
+        now = self._read()
+        history = self._history
+        history.append(now)
+        while len(history) > 2 and now[0] - history[1][0] >= self.burst_window:
+            history.popleft()
+        if now[0] - history[0][0] >= self.burst_window:
+            percent = _percent(history[0][1:], now[1:])
+            self._peak = percent if self._peak is None else max(self._peak, percent)
+
+    def take(self):
+        """(average %, peak burst_window %) since the previous take"""
+        self.sample()
+        now = self._history[-1]
+        average = _percent(self._last_take[1:], now[1:])
+        peak = max(average, self._peak) if self._peak is not None else average
+        self._last_take = now
+        self._peak = None
+        return average, peak
@@ -0,0 +1,109 @@
+# shared/host/scheduler.py
+
+import time
+import heapq
+from collections import deque
+
+LATENESS_HISTORY = 1000
+
+
+class Job:
+    """A collector run every ``period`` seconds, with its timing statistics"""
+
+    def __init__(self, name, fn, period, deadline):
+        self.name = name
+        self.fn = fn
+        self.period = period
+        self.deadline = deadline
+        self.runs = 0
+        self.missed = 0
+        self.errors = 0
+        self.runtime = 0.0
+        self.max_lateness = 0.0
+        self.lateness = deque(maxlen=LATENESS_HISTORY)
+
+    def stats(self):
+        recent = sorted(self.lateness)
+        p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+        return {
+            "period": self.period,
+            "runs": self.runs,
+            "missed": self.missed,
+            "errors": self.errors,
+            "mean_lateness_ms": round(sum(recent) / len(recent) * 1e3, 2) if recent else 0.0,
+            "p99_lateness_ms": round(p99 * 1e3, 2),
+            "max_lateness_ms": round(self.max_lateness * 1e3, 2),
+            "mean_runtime_ms": round(self.runtime / self.runs * 1e3, 2) if self.runs else 0.0,
+        }
+
+
+class Scheduler:
+    """Runs collectors on fixed deadlines in one thread.
+
+    Deadlines are ``start + n * period`` on the monotonic clock, so a run's
+    duration or a late wake-up never shifts later runs. A job that falls more
+    than a full period behind skips the deadlines it missed (counted in
+    ``missed``) rather than running back to back to catch up. Every run
+    records its lateness (start time minus deadline) for ``stats()``.
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.jobs = []
+        self._heap = []
+
+    def every(self, period, fn, name=None, delay=0.0):
+        """Run ``fn()`` every ``period`` seconds, first after ``delay``"""
+        job = Job(name or fn.__name__, fn, period, self.clock() + delay)
+        self.jobs.append(job)
+        heapq.heappush(self._heap, (job.deadline, len(self.jobs), job))
+        return job
+
+    def run_pending(self):
+        """Run every job whose deadline has passed; returns the next deadline"""
+        while self._heap and self._heap[0][0] <= self.clock():
+            deadline, order, job = heapq.heappop(self._heap)
+            start = self.clock()
+            lateness = start - deadline
+            job.lateness.append(lateness)
+            job.max_lateness = max(job.max_lateness, lateness)
+            try:
+                job.fn()
+            except Exception as e:
+                job.errors += 1
+                print(f"⚠️ Error in collector {job.name}:", e)
+            end = self.clock()
+            job.runs += 1
+            job.runtime += end - start
+
+            job.deadline = deadline + job.period
+            if job.deadline <= end:
+                skipped = int((end - job.deadline) // job.period) + 1
+                job.missed += skipped
+                job.deadline += skipped * job.period
+            heapq.heappush(self._heap, (job.deadline, order, job))
+        return self._heap[0][0] if self._heap else None
+
+    def run(self, duration=None):
+        """Run jobs until ``duration`` seconds have passed (forever if None)"""
+        end = self.clock() + duration if duration is not None else None
+        while True:
+            next_deadline = self.run_pending()
+            now = self.clock()
+            if end is not None and now >= end:
+                return
+            if next_deadline is None:
+                return
+            wake = next_deadline if end is None else min(next_deadline, end)
+            if wake > now:
+                self.sleep(wake - now)
+
+    def stats(self):
+        return {job.name: job.stats() for job in self.jobs}
+
+    def print_stats(self):
+        for name, stats in self.stats().items():
+            print(f"⏱️ {name}: {stats['runs']} runs, {stats['missed']} missed deadlines, lateness mean "
+                  f"{stats['mean_lateness_ms']} ms / p99 {stats['p99_lateness_ms']} ms / max {stats['max_lateness_ms']} ms, "
+                  f"runtime {stats['mean_runtime_ms']} ms")
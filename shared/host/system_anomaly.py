@@ -0,0 +1,87 @@
+# shared/host/system_anomaly.py
+
+import time
+import atexit
+import socket
+from shared.host.baselines import BaselineStore
+
+METRICS = ("cpu", "memory", "disk")
+ANOMALY_TYPES = {"cpu": "High CPU Usage", "memory": "High Memory Usage", "disk": "High Disk Usage"}
+# Fixed limits, used until a metric's baseline has warmed up
+THRESHOLDS = {"cpu": 85, "memory": 85, "disk": 90}
+# Smallest spread (percentage points) a score is measured against
+MIN_SCALE = {"cpu": 5.0, "memory": 2.0, "disk": 1.0}
+Z_THRESHOLD = 4.0
+HIGH_Z = 8.0
+SAVE_INTERVAL = 300  # seconds
+
+
+class SystemAnomalyDetector:
+    """Flags CPU, memory and disk samples that stand out from this host's own baselines.
+
+    Every metric is scored on every call (see BaselineStore) and each one
+    ``z_threshold`` or more above its baseline is reported, highest score
+    first: ``"High Memory Usage, High CPU Usage"``. Severity is High from
+    ``high_z``. While a metric is still warming up it falls back to the
+    fixed thresholds. With a ``state_path`` the baselines are restored at
+    start, saved every ``save_interval`` seconds and at exit.
+    """
+
+    def __init__(self, state_path=None, host=None, z_threshold=Z_THRESHOLD, high_z=HIGH_Z,
+                 save_interval=SAVE_INTERVAL, store=None):
+        self.state_path = state_path
+        self.host = host or socket.gethostname()
+        self.z_threshold = z_threshold
+        self.high_z = high_z
+        self.save_interval = save_interval
+        if store is None:
+            store = BaselineStore.load(state_path) if state_path else BaselineStore()
+        self.store = store
+        self.keys = [f"{self.host}/{metric}" for metric in METRICS]
+        self.min_scale = [MIN_SCALE[metric] for metric in METRICS]
+        self.scores = {}
+        self._last_save = time.monotonic()
+        if state_path:
+            atexit.register(self.save)
+
+    def detect(self, cpu, memory, disk, ts=None):
+        """(anomaly, anomaly_type, severity); per-metric scores are left in ``scores``"""
+        values = {"cpu": cpu, "memory": memory, "disk": disk}
+        scores = self.store.score_update(self.keys, [values[metric] for metric in METRICS], ts,
+                                         min_scale=self.min_scale)
+        self.scores = dict(zip(METRICS, scores.tolist()))
+
+        flagged = []
+        severity = "Medium"
+        for metric, score in self.scores.items():
+            if score != score:  # NaN: still warming up
+                if values[metric] > THRESHOLDS[metric]:
+                    flagged.append((float("inf"), metric))
+                    if metric == "cpu":
+                        severity = "High"
+            elif score >= self.z_threshold:
+                flagged.append((score, metric))
+                if score >= self.high_z:
+                    severity = "High"
+
+        if self.state_path and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+        if not flagged:
+            return False, None, None
+        flagged.sort(key=lambda item: -item[0])
+        return True, ", ".join(ANOMALY_TYPES[metric] for _, metric in flagged), severity
+
+    def save(self):
+        self._last_save = time.monotonic()
+        try:
+            self.store.save(self.state_path)
+        except Exception as e:
+            print("⚠️ Error saving baseline state:", e)
+
+
+def top_app_metric(anomaly_type):
+    """Which get_top_apps entry explains an anomaly: the first metric it names (memory when there is none)"""
+    named = [(anomaly_type.find(word), metric) for word, metric in (("CPU", "cpu"), ("Memory", "memory"),
+                                                                   ("Disk", "disk"))
+             if anomaly_type and word in anomaly_type]
+    return min(named)[1] if named else "memory"
@@ -0,0 +1,137 @@
+# shared/llm/explanation_cache.py
+
+import re
+import json
+import time
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+LLM_LOG_PATH = "data/llm_logs.jsonl"
+ANY_APP = "*"
+# App names that say nothing about the process, so an app-agnostic entry may answer them
+UNKNOWN_APPS = ("", "unknown")
+
+_LEGACY_METRIC = re.compile(r"(CPU|Memory|Disk) Usage: ([\d.]+)%")
+_LEGACY_TYPE = re.compile(r"Anomaly Type: (.+)")
+
+
+class ExplanationCache:
+    """LRU + TTL cache of LLM explanations keyed on the normalized anomaly context.
+
+    The key is (anomaly type, metric, app name, value bucket), so a sustained
+    episode with the value drifting by a point or two reuses one explanation.
+    Older log entries carry no app name; they are loaded under ``ANY_APP``
+    and only answer requests whose own app is unknown.
+    The cache is persisted implicitly: every LLM answer is appended to
+    ``data/llm_logs.jsonl``, and the cache warm-starts from that file on first use.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600, bucket_size=2.0, path=LLM_LOG_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.bucket_size = bucket_size
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = path is None
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, anomaly_type, metric, app_name, value):
+        bucket = int(float(value) // self.bucket_size)
+        return (str(anomaly_type).strip().lower(), str(metric).lower(),
+                str(app_name).strip().lower(), bucket)
+
+    def _lookup(self, key, now):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        created, response = item
+        if now - created > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def get(self, key):
+        """Cached response for ``key``; an app-agnostic entry only answers when the app is unknown"""
+        self._ensure_warm()
+        now = time.time()
+        with self._lock:
+            response = self._lookup(key, now)
+            if response is None and key[2] in UNKNOWN_APPS:
+                response = self._lookup(key[:2] + (ANY_APP,) + key[3:], now)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key, response, created=None):
+        with self._lock:
+            self._entries[key] = (created or time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _ensure_warm(self):
+        if not self._warmed:
+            self._warmed = True
+            loaded = self.warm_start(self.path)
+            if loaded:
+                print(f"🧠 Explanation cache warm-started with {loaded} entries")
+
+    def warm_start(self, path):
+        """Load still-fresh explanations from an llm_logs.jsonl file"""
+        now = time.time()
+        loaded = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return 0
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                created = datetime.fromisoformat(entry["timestamp"]).timestamp()
+            except (ValueError, KeyError, TypeError):
+                continue
+            response = entry.get("response", "")
+            if now - created > self.ttl or not response or response.startswith("LLM explanation failed"):
+                continue
+            key = self._key_from_entry(entry)
+            if key is not None:
+                self.put(key, response, created=created)
+                loaded += 1
+        return loaded
+
+    def _key_from_entry(self, entry):
+        if "metric" in entry:
+            return self.make_key(entry.get("anomaly_type", ""), entry["metric"],
+                                 entry.get("app_name", ""), entry.get("value", 0))
+
+        # Older entries only carry the prompt text and no app name
+        prompt = entry.get("prompt", "")
+        anomaly_type = _LEGACY_TYPE.search(prompt)
+        metrics = {name.lower(): float(value) for name, value in _LEGACY_METRIC.findall(prompt)}
+        if not anomaly_type or not metrics:
+            return None
+        from shared.llm.llm_utils import anomaly_context
+        context = anomaly_context({"anomaly_type": anomaly_type.group(1).strip(), **metrics})
+        if context["metric"] is None:
+            return None
+        return self.make_key(context["anomaly_type"], context["metric"], ANY_APP, context["value"])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+explanation_cache = ExplanationCache()
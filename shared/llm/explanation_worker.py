@@ -0,0 +1,181 @@
+# shared/llm/explanation_worker.py
+
+import os
+import csv
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from shared.llm.llm_utils import explain_anomaly_via_llm, anomaly_context
+from shared.llm.explanation_cache import explanation_cache, LLM_LOG_PATH
+from shared.logs.log_store import append_atomic, format_csv_rows
+
+PENDING_PREFIX = "[pending:"
+BUSY_MESSAGE = "LLM explanation skipped (explainer busy)."
+
+
+def pending_marker(explanation_id):
+    return f"{PENDING_PREFIX}{explanation_id}]"
+
+
+def pending_id(text):
+    """Explanation id from a pending marker, or None if ``text`` is not one"""
+    text = str(text or "")
+    if text.startswith(PENDING_PREFIX) and text.endswith("]"):
+        return text[len(PENDING_PREFIX):-1]
+    return None
+
+
+class ExplanationWorker:
+    """Bounded background pool for LLM explanations.
+
+    ``submit`` returns immediately with a pending marker that the collector
+    logs in place of the explanation. When the LLM answers (or times out) the
+    result is appended to ``data/llm_logs.jsonl`` under the same id, where
+    ``resolve_pending`` picks it up for the dashboards. Explanations already in
+    the cache are returned directly without touching the pool.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, timeout=(5, 30), log_path=LLM_LOG_PATH,
+                 cache=explanation_cache):
+        self.timeout = timeout
+        self.log_path = log_path
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-explainer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._stats_lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "dropped": 0, "cached": 0,
+                      "total_seconds": 0.0}
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def submit(self, row, timestamp=None):
+        """Queue an explanation for ``row``; returns the text to log right now"""
+        context = anomaly_context(row)
+        key = None
+        if self.cache and context["metric"]:
+            key = self.cache.make_key(context["anomaly_type"], context["metric"],
+                                      context["app_name"], context["value"])
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("cached")
+                return cached
+
+        if not self._slots.acquire(blocking=False):
+            self._count("dropped")
+            return BUSY_MESSAGE
+        explanation_id = uuid.uuid4().hex[:12]
+        self._count("submitted")
+        self._executor.submit(self._explain, explanation_id, dict(row), context, key, timestamp)
+        return pending_marker(explanation_id)
+
+    def _explain(self, explanation_id, row, context, key, timestamp):
+        start = time.perf_counter()
+        try:
+            response = explain_anomaly_via_llm(row, timeout=self.timeout, cache=None)
+            failed = response.startswith("LLM explanation failed")
+        except Exception as e:
+            response = f"LLM explanation failed ({e})."
+            failed = True
+        finally:
+            self._slots.release()
+
+        elapsed = time.perf_counter() - start
+        self._count("failed" if failed else "completed")
+        self._count("total_seconds", elapsed)
+        if key is not None and not failed:
+            self.cache.put(key, response)
+
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "id": explanation_id,
+            "anomaly_timestamp": timestamp,
+            "prompt": f"Anomaly Detected: {row.get('anomaly_type')} (top app: {row.get('top_app_name')})",
+            "anomaly_type": context["anomaly_type"],
+            "metric": context["metric"],
+            "app_name": context["app_name"],
+            "value": context["value"],
+            "response": response,
+            "latency_seconds": round(elapsed, 3),
+        }
+        try:
+            append_atomic(self.log_path, (json.dumps(entry) + "\n").encode("utf-8"))
+        except OSError as e:
+            print("⚠️ Error writing LLM log:", e)
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class ExplanationIndex:
+    """id -> response lookup over llm_logs.jsonl, refreshed incrementally by byte offset"""
+
+    def __init__(self, path=LLM_LOG_PATH):
+        self.path = path
+        self._responses = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self._offset:
+            self._responses.clear()
+            self._offset = 0
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "id" in entry:
+                self._responses[entry["id"]] = entry.get("response", "")
+        self._offset += end
+
+    def get(self, explanation_id):
+        with self._lock:
+            self._refresh()
+            return self._responses.get(explanation_id)
+
+
+_index = ExplanationIndex()
+
+
+def resolve_pending(rows, key="explanation", index=None):
+    """Copy of ``rows`` with pending markers replaced by explanations that have since arrived"""
+    index = index or _index
+    resolved = []
+    for row in rows:
+        explanation_id = pending_id(row.get(key))
+        if explanation_id:
+            response = index.get(explanation_id)
+            row = dict(row, **{key: response if response is not None else "Explanation pending..."})
+        resolved.append(row)
+    return resolved
+
+
+def resolved_csv(path, key="explanation", index=None, chunk_rows=1000):
+    """The CSV log at ``path`` with pending markers resolved, streamed in chunks of encoded rows"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        yield format_csv_rows(fieldnames, [dict(zip(fieldnames, fieldnames))])
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield format_csv_rows(fieldnames, resolve_pending(chunk, key=key, index=index))
+                chunk = []
+        if chunk:
+            yield format_csv_rows(fieldnames, resolve_pending(chunk, key=key, index=index))
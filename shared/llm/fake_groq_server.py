@@ -0,0 +1,68 @@
+# shared/llm/fake_groq_server.py
+#
+# Local stand-in for the Groq chat completions API, for exercising the
+# explainer under latency and failures:
+#
+#   python -m shared.llm.fake_groq_server --latency 3 --failure-rate 0.2
+#   GROQ_API_URL=http://127.0.0.1:8808/openai/v1/chat/completions python main.py
+#
+# shared/llm/worker_check.py runs ExplanationWorker against it and checks the results.
+
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=500, retry_after=None):
+    class FakeGroqHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+            if random.random() < failure_rate:
+                self.send_response(failure_status)
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": {"message": "simulated failure"}}).encode())
+                return
+
+            prompt = body.get("messages", [{}])[-1].get("content", "")
+            payload = {
+                "choices": [{"message": {"role": "assistant",
+                                         "content": f"[stand-in] explanation for: {prompt[:80]}"}}]
+            }
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeGroqHandler
+
+
+def serve(port=8808, **kwargs):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**kwargs))
+    print(f"🧪 Fake Groq API listening on http://127.0.0.1:{port}/openai/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq API")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-status", type=int, default=500)
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+    serve(args.port, latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+          failure_status=args.failure_status, retry_after=args.retry_after)
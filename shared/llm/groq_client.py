@@ -0,0 +1,151 @@
+# shared/llm/groq_client.py
+
+import os
+import re
+import time
+import random
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+
+
+def parse_reset_header(value):
+    """Seconds from a Retry-After ("3") or x-ratelimit-reset ("2m59.56s", "500ms") header"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+class GroqClient:
+    """Keep-alive, retrying client for the Groq chat completions API.
+
+    One ``requests.Session`` with a connection pool is shared by every caller,
+    so TLS handshakes happen once per pooled connection instead of per call.
+    Retries use exponential backoff with jitter and honor ``Retry-After`` /
+    ``x-ratelimit-reset-*`` headers on 429s. At most ``max_concurrency``
+    requests are in flight; extra callers wait for a slot.
+    """
+
+    def __init__(self, api_key=None, url=GROQ_API_URL, connect_timeout=5, read_timeout=30,
+                 max_retries=3, backoff_base=0.5, backoff_max=20, max_concurrency=4, pool_size=8):
+        self.api_key = api_key if api_key is not None else os.getenv("GROQ_API_KEY")
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self.counters = {"requests": 0, "success": 0, "errors": 0, "retries": 0, "rate_limited": 0}
+
+    def _count(self, key):
+        with self._metrics_lock:
+            self.counters[key] += 1
+
+    def _backoff(self, attempt, response=None):
+        delay = None
+        if response is not None:
+            headers = response.headers
+            delay = parse_reset_header(headers.get("Retry-After"))
+            if delay is None:
+                delay = parse_reset_header(headers.get("x-ratelimit-reset-requests")
+                                           or headers.get("x-ratelimit-reset-tokens"))
+        if delay is None:
+            delay = self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.5)
+        return min(delay, self.backoff_max)
+
+    def post(self, payload, timeout=None):
+        """POST ``payload``; returns the decoded JSON or raises the last error"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        timeout = timeout or self.timeout
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            response = None
+            start = time.perf_counter()
+            with self._slots:
+                self._count("requests")
+                try:
+                    response = self.session.post(self.url, headers=headers, json=payload, timeout=timeout)
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        with self._metrics_lock:
+                            self._latencies.append(time.perf_counter() - start)
+                        self._count("success")
+                        return response.json()
+                    if response.status_code == 429:
+                        self._count("rate_limited")
+                    last_error = requests.HTTPError(f"{response.status_code} from Groq API", response=response)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = e
+                except requests.RequestException as e:
+                    # Non-retryable (e.g. 400/401)
+                    self._count("errors")
+                    raise
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+
+        self._count("errors")
+        raise last_error
+
+    def chat(self, messages, model="llama3-70b-8192", temperature=0.5, timeout=None):
+        result = self.post({"model": model, "messages": messages, "temperature": temperature}, timeout=timeout)
+        return result["choices"][0]["message"]["content"]
+
+    def metrics(self):
+        with self._metrics_lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self.counters)
+        if latencies:
+            counters["latency_p50"] = round(latencies[len(latencies) // 2], 3)
+            counters["latency_p95"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+            counters["latency_max"] = round(latencies[-1], 3)
+        return counters
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_groq_client():
+    """Process-wide client shared by the collector loops and dashboards"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GroqClient()
+        return _client
+
+
+def set_groq_client(client):
+    """Replace the process-wide client (e.g. one pointed at fake_groq_server)"""
+    global _client
+    with _client_lock:
+        _client = client
@@ -1,10 +1,12 @@
 import requests
 
 import os
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-url = "https://api.groq.com/openai/v1/chat/completions"
+from shared.llm.groq_client import get_groq_client
 
-def query_groq_for_app_explanation(top_app_name, top_value, current_explanation, metric="memory"):
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+LLM_DEBUG = os.getenv("LLM_DEBUG") == "1"
+
+def query_groq_for_app_explanation(top_app_name, top_value, current_explanation, metric="memory", timeout=DEFAULT_TIMEOUT, client=None):
     try:
         top_value = float(top_value)
     except:
@@ -48,35 +50,25 @@ Explain clearly why this app might be consuming so much disk. Include causes lik
     extra_prompt = prompt_map.get(metric.lower(), prompt_map["memory"])
     full_prompt = current_explanation.strip() + "\n\n✅ Add to the above:\n" + extra_prompt.strip()
 
-    # Debug print
-    print("=== Prompt Sent to Groq ===")
-    print(full_prompt)
-
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    # Debug print (set LLM_DEBUG=1)
+    if LLM_DEBUG:
+        print("=== Prompt Sent to Groq ===")
+        print(full_prompt)
 
-    data = {
-        "model": "llama3-70b-8192",
-        "messages": [
-            {
-                "role": "system",
-                "content": "You are an expert system analyst. Explain the likely technical cause for application resource spikes."
-            },
-            {
-                "role": "user",
-                "content": full_prompt
-            }
-        ],
-        "temperature": 0.5
-    }
+    messages = [
+        {
+            "role": "system",
+            "content": "You are an expert system analyst. Explain the likely technical cause for application resource spikes."
+        },
+        {
+            "role": "user",
+            "content": full_prompt
+        }
+    ]
 
     try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
-        return result['choices'][0]['message']['content']
+        client = client or get_groq_client()
+        return client.chat(messages, model="llama3-70b-8192", temperature=0.5, timeout=timeout)
     except requests.exceptions.RequestException as e:
         print("❌ Error calling Groq API:", e)
         if e.response is not None:
@@ -1,6 +1,8 @@
-from shared.llm.llm_explainer import query_groq_for_app_explanation
+from shared.llm.llm_explainer import query_groq_for_app_explanation, DEFAULT_TIMEOUT
+from shared.llm.explanation_cache import explanation_cache
 
-def explain_anomaly_via_llm(row):
+def anomaly_context(row):
+    """Normalized (anomaly_type, metric, value, app_name) for an anomaly row"""
     anomaly_type = row.get("anomaly_type", "")
     cpu = float(row.get("cpu", 0))
     memory = float(row.get("memory", 0))
@@ -27,9 +29,25 @@ def explain_anomaly_via_llm(row):
     else:
         app_name = top_app  # fallback to string
 
-    # Generate explanation if metric identified
+    return {"anomaly_type": anomaly_type, "metric": metric, "value": round(value, 2), "app_name": app_name}
+
+def explain_anomaly_via_llm(row, timeout=DEFAULT_TIMEOUT, cache=explanation_cache):
+    context = anomaly_context(row)
+    anomaly_type = context["anomaly_type"]
+    metric = context["metric"]
+    value = context["value"]
+
+    # Generate explanation if metric identified (cache=None bypasses the cache)
     if metric:
-        base_prompt = f"Anomaly Detected: {anomaly_type}. {metric.upper()} usage reached {round(value, 2)}%."
-        return query_groq_for_app_explanation(app_name, round(value, 2), base_prompt, metric)
+        key = cache.make_key(anomaly_type, metric, context["app_name"], value) if cache else None
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            return cached
+
+        base_prompt = f"Anomaly Detected: {anomaly_type}. {metric.upper()} usage reached {value}%."
+        explanation = query_groq_for_app_explanation(context["app_name"], value, base_prompt, metric, timeout=timeout)
+        if cache and not explanation.startswith("LLM explanation failed"):
+            cache.put(key, explanation)
+        return explanation
     else:
         return f"Anomaly detected: {anomaly_type}. Unable to determine specific resource."
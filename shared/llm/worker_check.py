@@ -0,0 +1,108 @@
+# shared/llm/worker_check.py
+#
+# End-to-end check of ExplanationWorker against fake_groq_server, no Groq key
+# or network needed:
+#
+#   python -m shared.llm.worker_check --latency 0.3 --failure-rate 0.3
+#
+# Each round submits a burst of anomalies faster than the pool can answer and
+# checks that at most max_pending are accepted (the rest get BUSY_MESSAGE),
+# that every failure is written to the LLM log like any other answer, and
+# that resolve_pending replaces every [pending:<id>] marker once the pool is
+# drained. Exits non-zero on the first failed check.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from shared.llm.fake_groq_server import make_handler
+from shared.llm.groq_client import GroqClient, set_groq_client
+from shared.llm.explanation_worker import (ExplanationWorker, ExplanationIndex, resolve_pending, pending_id,
+                                           BUSY_MESSAGE)
+
+
+def check(condition, message):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def run_round(worker, burst, max_pending, round_number):
+    rows = []
+    for i in range(burst):
+        row = {"cpu": 90 + i % 10, "memory": 40, "disk": 20, "anomaly_type": "High CPU Usage",
+               "top_app_name": f"app-{round_number}-{i}"}
+        rows.append(dict(row, explanation=worker.submit(row, f"round-{round_number}-{i}")))
+
+    markers = [row["explanation"] for row in rows if pending_id(row["explanation"])]
+    busy = [row for row in rows if row["explanation"] == BUSY_MESSAGE]
+    check(0 < len(markers) <= max_pending, f"round {round_number}: {len(markers)} queued, bound is {max_pending}")
+    check(len(markers) + len(busy) == burst, f"round {round_number}: the other {len(busy)} were turned away")
+    return rows
+
+
+def wait_idle(worker, timeout=60):
+    """Wait until every queued explanation has been answered or has failed"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = dict(worker.stats)
+        if stats["completed"] + stats["failed"] >= stats["submitted"]:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ExplanationWorker against a local fake Groq API")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 make_handler(latency=args.latency, failure_rate=args.failure_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/openai/v1/chat/completions"
+    # No retries, so simulated failures reach the log instead of being retried away
+    set_groq_client(GroqClient(api_key="fake", url=url, max_retries=0))
+
+    log_path = os.path.join(tempfile.mkdtemp(prefix="worker-check-"), "llm_logs.jsonl")
+    worker = ExplanationWorker(max_workers=args.max_workers, max_pending=args.max_pending, log_path=log_path,
+                               cache=None)
+    index = ExplanationIndex(log_path)
+
+    rows = []
+    for round_number in range(args.rounds):
+        rows += run_round(worker, args.max_pending * 2, args.max_pending, round_number)
+        # Let the burst drain so the next one finds free slots
+        check(wait_idle(worker), f"round {round_number}: pool drained")
+    worker.close(wait=True)
+    server.shutdown()
+
+    resolved = resolve_pending(rows, index=index)
+    unresolved = [row for row in resolved if row["explanation"] == "Explanation pending..."
+                  or pending_id(row["explanation"])]
+    queued = sum(1 for row in rows if pending_id(row["explanation"]))
+    check(not unresolved, f"resolve_pending back-filled all {queued} pending markers")
+
+    with open(log_path) as f:
+        entries = [json.loads(line) for line in f]
+    failed = [entry for entry in entries if entry["response"].startswith("LLM explanation failed")]
+    check(len(entries) == queued, f"{len(entries)} log entries, one per queued explanation")
+    if args.failure_rate > 0:
+        check(failed, f"{len(failed)} simulated failures logged and resolved like any other answer")
+    print(f"📦 Log: {log_path}")
+
+
+if __name__ == "__main__":
+    main()
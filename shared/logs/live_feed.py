@@ -0,0 +1,194 @@
+# shared/logs/live_feed.py
+
+import json
+import queue
+import threading
+from collections import OrderedDict
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+from shared.logs.metrics_ring import get_reader, to_series, METRIC_FIELDS
+from shared.llm.explanation_worker import ExplanationIndex, pending_id, resolve_pending
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_BUFFER = 256
+TAIL_ROWS = 50
+MAX_TRACKED_EXPLANATIONS = 100
+# Polls to wait for an anomaly seen in the ring to reach the log
+ANOMALY_ROW_POLLS = 10
+ANOMALY_FIELDS = ("timestamp", "anomaly_type", "severity", "top_app_name", "explanation",
+                  "model_prediction", "model_class")
+
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """One client's queue of pre-formatted SSE messages"""
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self.closed = False
+
+    def stream(self, heartbeat=HEARTBEAT_SECONDS):
+        """Generator for a streaming response; unsubscribes when the client goes away"""
+        try:
+            yield "retry: 3000\n\n"
+            while not self.closed:
+                try:
+                    yield self.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            self.feed.unsubscribe(self)
+
+
+class LiveFeed:
+    """Pushes new metric points, anomalies and explanations of one log to SSE clients.
+
+    A single thread per dashboard process polls for changes every
+    ``poll_interval`` seconds while anyone is subscribed, formats each event
+    once and fans it out to every subscriber's queue. New points come from
+    the collector's shared-memory ring when it is running (anomaly details
+    are then read from the log only when a new point is an anomaly), or from
+    the tail of the log otherwise. Anomalies logged with a pending
+    explanation are watched, and an ``explanation`` event follows once the
+    LLM answer lands. A subscriber that falls ``SUBSCRIBER_BUFFER`` messages
+    behind is dropped rather than slowing the others down.
+    """
+
+    def __init__(self, log_path, schema=SERVER_LOG_SCHEMA, poll_interval=POLL_INTERVAL, index=None):
+        self.log_path = log_path
+        self.store = open_log_store(log_path, schema)
+        self.poll_interval = poll_interval
+        self.index = index or ExplanationIndex()
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._cursor = None
+        self._last_timestamp = None
+        self._pending = OrderedDict()
+        self._awaiting = {}
+        self.stats = {"polls": 0, "events": 0, "dropped_subscribers": 0}
+
+    def subscribe(self):
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _run(self):
+        while True:
+            if not self.subscriber_count():
+                # Idle until someone subscribes; start from "now" again when they do
+                self._wakeup.wait()
+                self._wakeup.clear()
+                self._cursor = self._last_timestamp = None
+                self._awaiting.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                print("⚠️ Error polling live feed:", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _broadcast(self, event, data):
+        message = sse_message(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                self.unsubscribe(subscription)
+                self.stats["dropped_subscribers"] += 1
+        self.stats["events"] += 1
+
+    def _new_rows(self):
+        """(metric points, anomaly rows) logged since the last poll"""
+        ring = get_reader(self.log_path)
+        if ring is not None:
+            if self._cursor is None:
+                self._cursor = ring.cursor()
+                return [], []
+            records, self._cursor = ring.read_since(self._cursor)
+            if not len(records):
+                return [], self._logged_anomalies()
+            series = to_series(records)
+            points = [dict(zip(series, values)) for values in zip(*series.values())]
+            for point, flag in zip(points, records["anomaly"].tolist()):
+                if flag:
+                    self._awaiting[point["timestamp"]] = ANOMALY_ROW_POLLS
+            return points, self._logged_anomalies()
+
+        rows = self.store.tail(TAIL_ROWS)
+        last = self._last_timestamp
+        self._last_timestamp = str(rows[-1]["timestamp"]) if rows else last
+        if last is None:
+            return [], []
+        rows = [row for row in rows if str(row["timestamp"]) > last]
+        points = [{"timestamp": str(row["timestamp"]), **{field: row[field] for field in METRIC_FIELDS}} for row in rows]
+        return points, [row for row in rows if str(row.get("anomaly")) == "1"]
+
+    def _logged_anomalies(self):
+        """Log rows of anomalies seen in the ring; the log writer may flush them a poll or two later"""
+        if not self._awaiting:
+            return []
+        rows = [row for row in self.store.tail(len(self._awaiting), where={"anomaly": 1})
+                if str(row["timestamp"]) in self._awaiting]
+        for row in rows:
+            self._awaiting.pop(str(row["timestamp"]), None)
+        for timestamp in list(self._awaiting):
+            self._awaiting[timestamp] -= 1
+            if self._awaiting[timestamp] <= 0:
+                del self._awaiting[timestamp]
+        return rows
+
+    def poll(self):
+        self.stats["polls"] += 1
+        points, anomalies = self._new_rows()
+        for point in points:
+            self._broadcast("metric", point)
+        for row in anomalies:
+            explanation_id = pending_id(row.get("explanation"))
+            event = {field: str(row.get(field, "")) for field in ANOMALY_FIELDS}
+            event["explanation"] = resolve_pending([row], index=self.index)[0]["explanation"]
+            event["explanation_id"] = explanation_id
+            self._broadcast("anomaly", event)
+            if explanation_id and event["explanation"] == "Explanation pending...":
+                self._pending[explanation_id] = event["timestamp"]
+                while len(self._pending) > MAX_TRACKED_EXPLANATIONS:
+                    self._pending.popitem(last=False)
+        for explanation_id, timestamp in list(self._pending.items()):
+            response = self.index.get(explanation_id)
+            if response is not None:
+                del self._pending[explanation_id]
+                self._broadcast("explanation", {"explanation_id": explanation_id, "timestamp": timestamp,
+                                                "explanation": response})
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_live_feed(log_path, index=None):
+    """The process-wide feed for ``log_path``"""
+    with _feeds_lock:
+        if log_path not in _feeds:
+            _feeds[log_path] = LiveFeed(log_path, index=index)
+        return _feeds[log_path]
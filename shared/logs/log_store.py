@@ -0,0 +1,419 @@
+# shared/logs/log_store.py
+
+import io
+import os
+import csv
+import json
+import time
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from shared.logs.tail_reader import get_tail_reader
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Column kinds: "time" -> datetime64[s], "float32"/"int8"/"int32" -> numeric,
+# "str" -> dictionary-encoded (int32 codes + per-segment dictionary)
+SERVER_LOG_SCHEMA = {
+    "timestamp": "time",
+    "cpu": "float32",
+    "memory": "float32",
+    "disk": "float32",
+    "anomaly": "int8",
+    "anomaly_type": "str",
+    "severity": "str",
+    "top_app_name": "str",
+    "explanation": "str",
+    "model_prediction": "int8",
+    "model_class": "str",
+}
+
+NETWORK_LOG_SCHEMA = {
+    "timestamp": "time",
+    "new_ip_detected": "str",
+    "port_scan_detected": "str",
+    "model_prediction": "int8",
+    "model_class": "str",
+}
+
+BACKEND_ENV = "LOG_STORE_BACKEND"
+
+
+def append_atomic(path, data, fsync=False):
+    """Append ``data`` with a single write on an O_APPEND descriptor.
+
+    Concurrent appenders (collector loops, analyze_dataset.py) can then never
+    interleave partial rows, and readers only ever see whole batches or a
+    not-yet-complete tail, which the tail reader skips.
+    """
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def format_csv_rows(fieldnames, rows):
+    buf = io.StringIO()
+    csv.DictWriter(buf, fieldnames=fieldnames, extrasaction="ignore").writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+class LogStore:
+    """Common interface of the monitoring log backends"""
+
+    def __init__(self, path, schema):
+        self.path = path
+        self.schema = schema
+        self.fieldnames = list(schema)
+
+    def init(self):
+        pass
+
+    def append(self, row, fsync=False):
+        self.append_many([row], fsync=fsync)
+
+    def append_many(self, rows, fsync=False):
+        raise NotImplementedError
+
+    def read(self, columns=None, start=None, end=None):
+        """DataFrame of ``columns`` with ``start <= timestamp < end``"""
+        raise NotImplementedError
+
+    def tail(self, n, columns=None, where=None):
+        """Last ``n`` rows as dicts (oldest first), optionally filtered by ``where={col: value}``"""
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class CsvLogStore(LogStore):
+    """The original one-row-per-line CSV log"""
+
+    def init(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if not os.path.exists(self.path):
+            with open(self.path, mode="w", newline="") as f:
+                csv.DictWriter(f, fieldnames=self.fieldnames).writeheader()
+
+    def append_many(self, rows, fsync=False):
+        append_atomic(self.path, format_csv_rows(self.fieldnames, rows), fsync=fsync)
+
+    def read(self, columns=None, start=None, end=None):
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(["timestamp"] + list(columns)))
+        df = pd.read_csv(self.path, usecols=usecols)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format=TIME_FORMAT, errors="coerce")
+        if start is not None:
+            df = df[df["timestamp"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["timestamp"] < pd.Timestamp(end)]
+        if columns is not None:
+            df = df[list(columns)]
+        return df.reset_index(drop=True)
+
+    def tail(self, n, columns=None, where=None):
+        reader = get_tail_reader(self.path)
+        if where:
+            rows = reader.tail_matching(n, lambda row: all(
+                str(row.get(col)) == str(value) for col, value in where.items()))
+            rows.reverse()
+        else:
+            rows = reader.tail(n)
+        if columns is not None:
+            rows = [{col: row.get(col) for col in columns} for row in rows]
+        return rows
+
+
+def _cast_column(kind, values):
+    if kind == "time":
+        parsed = [str(v).replace(" ", "T") if v not in (None, "") else "NaT" for v in values]
+        return np.array(parsed, dtype="datetime64[s]")
+    if kind.startswith("float"):
+        return np.array([float(v) if v not in (None, "") else np.nan for v in values], dtype=kind)
+    if kind.startswith("int"):
+        out = []
+        for v in values:
+            try:
+                out.append(int(float(v)))
+            except (TypeError, ValueError):
+                out.append(0)
+        return np.array(out, dtype=kind)
+    return np.array(["" if v is None else str(v) for v in values], dtype=object)
+
+
+class SegmentedLogStore(LogStore):
+    """Time-partitioned columnar log.
+
+    Layout under ``<log name>.segments/``::
+
+        _active.jsonl                      rows not yet sealed
+        2025-06-24/seg-<min>-<max>-<seq>/  one sealed segment
+            meta.json                      row count, time bounds, replaced segments
+            <col>.npy                      typed column, memory-mapped on read
+            <col>.dict.json                dictionary for "str" columns (codes in <col>.npy)
+
+    Rows go to the small active file first and are sealed into a columnar
+    segment every ``segment_rows`` rows or at a day boundary. Once a day has
+    more than ``compact_after`` segments they are merged into one. Reads only
+    open the partitions overlapping the requested time range and only the
+    requested columns.
+    """
+
+    def __init__(self, path, schema, segment_rows=3600, compact_after=8):
+        super().__init__(path, schema)
+        root, _ = os.path.splitext(path)
+        self.root = root + ".segments"
+        self.active_path = os.path.join(self.root, "_active.jsonl")
+        self.segment_rows = segment_rows
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._active_rows = None
+        self._active_day = None
+
+    def init(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._load_active()
+
+    # --- writing ---
+
+    def _load_active(self):
+        rows = self._read_active()
+        self._active_rows = len(rows)
+        self._active_day = rows[-1]["timestamp"][:10] if rows else None
+
+    def append_many(self, rows, fsync=False):
+        with self._lock:
+            if self._active_rows is None:
+                self.init()
+            pending = []
+            for row in rows:
+                day = str(row.get("timestamp", ""))[:10]
+                if self._active_day is not None and day != self._active_day:
+                    self._write_active(pending, fsync)
+                    pending = []
+                    self._seal()
+                pending.append(json.dumps({col: row.get(col) for col in self.fieldnames}))
+                self._active_rows += 1
+                self._active_day = day
+                if self._active_rows >= self.segment_rows:
+                    self._write_active(pending, fsync)
+                    pending = []
+                    self._seal()
+            self._write_active(pending, fsync)
+
+    def _write_active(self, lines, fsync=False):
+        if lines:
+            append_atomic(self.active_path, ("\n".join(lines) + "\n").encode("utf-8"), fsync=fsync)
+
+    def flush(self):
+        with self._lock:
+            if self._active_rows:
+                self._seal()
+
+    def _seal(self):
+        rows = self._read_active()
+        if rows:
+            columns = {col: _cast_column(kind, [row.get(col) for row in rows])
+                       for col, kind in self.schema.items()}
+            day = rows[0]["timestamp"][:10]
+            self._write_segment(day, columns)
+            self._maybe_compact(day)
+        if os.path.exists(self.active_path):
+            os.remove(self.active_path)
+        self._active_rows = 0
+        self._active_day = None
+
+    def _write_segment(self, day, columns, sources=()):
+        stamps = columns["timestamp"]
+        times = stamps[~np.isnat(stamps)].astype("int64")
+        min_ts, max_ts = (int(times.min()), int(times.max())) if len(times) else (0, 0)
+        name = f"seg-{min_ts}-{max_ts}-{time.time_ns()}"
+        partition = os.path.join(self.root, day)
+        os.makedirs(partition, exist_ok=True)
+        tmp_dir = os.path.join(partition, "." + name)
+        os.makedirs(tmp_dir)
+
+        for col, kind in self.schema.items():
+            values = columns[col]
+            if kind == "str":
+                uniques, codes = np.unique(values.astype(str), return_inverse=True)
+                np.save(os.path.join(tmp_dir, col + ".npy"), codes.astype("int32"))
+                with open(os.path.join(tmp_dir, col + ".dict.json"), "w") as f:
+                    json.dump(uniques.tolist(), f)
+            else:
+                np.save(os.path.join(tmp_dir, col + ".npy"), values)
+
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"rows": len(stamps), "min_ts": min_ts, "max_ts": max_ts,
+                       "sources": list(sources)}, f)
+        os.rename(tmp_dir, os.path.join(partition, name))
+
+    def _maybe_compact(self, day):
+        if len(self._segments(day)) > self.compact_after:
+            self.compact(day)
+
+    def compact(self, day):
+        """Merge every sealed segment of one day into a single segment"""
+        segments = self._segments(day)
+        if len(segments) < 2:
+            return
+        parts = [self._load_segment(seg, self.fieldnames, mmap=False) for seg in segments]
+        merged = {col: np.concatenate([part[col] for part in parts]) for col in self.fieldnames}
+        order = np.argsort(merged["timestamp"], kind="stable")
+        merged = {col: values[order] for col, values in merged.items()}
+        self._write_segment(day, merged, sources=[os.path.basename(seg) for seg in segments])
+        for seg in segments:
+            shutil.rmtree(seg, ignore_errors=True)
+
+    # --- reading ---
+
+    def _read_active(self):
+        rows = []
+        try:
+            with open(self.active_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break  # partially written last line
+        except FileNotFoundError:
+            pass
+        return rows
+
+    def _partitions(self, start=None, end=None):
+        if not os.path.isdir(self.root):
+            return []
+        days = sorted(d for d in os.listdir(self.root) if not d.startswith(("_", ".")))
+        if start is not None:
+            days = [d for d in days if d >= pd.Timestamp(start).strftime("%Y-%m-%d")]
+        if end is not None:
+            days = [d for d in days if d <= pd.Timestamp(end).strftime("%Y-%m-%d")]
+        return days
+
+    def _segments(self, day, start=None, end=None):
+        partition = os.path.join(self.root, day)
+        try:
+            names = [n for n in os.listdir(partition) if n.startswith("seg-")]
+        except FileNotFoundError:
+            return []
+
+        # Skip inputs of a compaction whose output is already visible
+        replaced = set()
+        for name in names:
+            try:
+                with open(os.path.join(partition, name, "meta.json")) as f:
+                    replaced.update(json.load(f).get("sources", []))
+            except (OSError, ValueError):
+                pass
+
+        selected = []
+        for name in names:
+            if name in replaced:
+                continue
+            _, min_ts, max_ts, _ = name.split("-")
+            if start is not None and int(max_ts) < pd.Timestamp(start).timestamp():
+                continue
+            if end is not None and int(min_ts) >= pd.Timestamp(end).timestamp():
+                continue
+            selected.append(os.path.join(partition, name))
+        return sorted(selected, key=lambda p: int(os.path.basename(p).split("-")[1]))
+
+    def _load_segment(self, seg, columns, mmap=True):
+        out = {}
+        for col in columns:
+            values = np.load(os.path.join(seg, col + ".npy"), mmap_mode="r" if mmap else None)
+            if self.schema[col] == "str":
+                with open(os.path.join(seg, col + ".dict.json")) as f:
+                    values = np.array(json.load(f), dtype=object)[values]
+            out[col] = values
+        return out
+
+    def _active_columns(self, columns):
+        rows = self._read_active()
+        return {col: _cast_column(self.schema[col], [row.get(col) for row in rows]) for col in columns}
+
+    def read(self, columns=None, start=None, end=None):
+        columns = list(columns) if columns is not None else self.fieldnames
+        needed = list(dict.fromkeys(["timestamp"] + columns))
+
+        parts = []
+        for day in self._partitions(start, end):
+            for seg in self._segments(day, start, end):
+                try:
+                    parts.append(self._load_segment(seg, needed))
+                except FileNotFoundError:
+                    continue  # removed by a concurrent compaction
+        parts.append(self._active_columns(needed))
+
+        data = {col: np.concatenate([part[col] for part in parts]) for col in needed}
+        df = pd.DataFrame(data)
+        if start is not None:
+            df = df[df["timestamp"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["timestamp"] < pd.Timestamp(end)]
+        return df[columns].reset_index(drop=True)
+
+    def tail(self, n, columns=None, where=None):
+        columns = list(columns) if columns is not None else self.fieldnames
+        needed = list(dict.fromkeys(["timestamp"] + columns + list(where or {})))
+
+        frames = []
+        remaining = n
+        sources = [None] + [seg for day in reversed(self._partitions())
+                            for seg in reversed(self._segments(day))]
+        for seg in sources:
+            try:
+                part = self._active_columns(needed) if seg is None else self._load_segment(seg, needed)
+            except FileNotFoundError:
+                continue
+            df = pd.DataFrame({col: np.asarray(part[col]) for col in needed})
+            for col, value in (where or {}).items():
+                df = df[df[col].astype(str) == str(value)]
+            frames.append(df.tail(remaining))
+            remaining -= len(frames[-1])
+            if remaining <= 0:
+                break
+
+        if not frames:
+            return []
+        df = pd.concat(list(reversed(frames)), ignore_index=True)
+        df["timestamp"] = df["timestamp"].dt.strftime(TIME_FORMAT)
+        return df[columns].to_dict(orient="records")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_log_store(path, schema, backend=None):
+    """Process-wide log store for ``path``; backend is "csv" (default) or "columnar".
+
+    The backend can also be chosen with the LOG_STORE_BACKEND environment variable.
+    """
+    backend = backend or os.getenv(BACKEND_ENV, "csv")
+    key = (os.path.abspath(path), backend)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "csv":
+                store = CsvLogStore(path, schema)
+            elif backend == "columnar":
+                store = SegmentedLogStore(path, schema)
+            else:
+                raise ValueError(f"Unknown log store backend: {backend}")
+            _stores[key] = store
+        return store
@@ -0,0 +1,86 @@
+# shared/logs/log_writer.py
+
+import time
+import atexit
+import threading
+from collections import deque
+
+FSYNC_POLICIES = ("never", "batch")
+
+
+class BatchedLogWriter:
+    """Background writer that group-commits queued rows to a log store.
+
+    ``enqueue`` only appends to a deque (atomic in CPython, no lock taken), so
+    the sampling loop never waits on disk. A daemon thread drains the queue
+    every ``flush_interval`` seconds, or as soon as ``batch_size`` rows are
+    waiting, and hands each batch to ``store.append_many`` as one write.
+    A failed batch is put back and retried on the next flush. The queue holds
+    at most ``max_queued`` rows, so while the store keeps failing (disk full,
+    permissions) the oldest rows are dropped and counted in ``stats``.
+    """
+
+    def __init__(self, store, flush_interval=1.0, batch_size=100, fsync="never", max_queued=10000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+
+        self._queue = deque(maxlen=max_queued)
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+        self.stats = {"rows": 0, "batches": 0, "errors": 0, "dropped": 0, "last_flush_seconds": 0.0}
+
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, row):
+        if len(self._queue) == self._queue.maxlen:
+            # The append below pushes the oldest row out
+            self.stats["dropped"] += 1
+        self._queue.append(row)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; safe to call from any thread"""
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                start = time.perf_counter()
+                try:
+                    self.store.append_many(batch, fsync=self.fsync == "batch")
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    # Put the batch back in order and retry on the next flush, dropping its oldest rows if full
+                    room = self._queue.maxlen - len(self._queue)
+                    if room < len(batch):
+                        self.stats["dropped"] += len(batch) - room
+                        batch = batch[len(batch) - room:] if room > 0 else []
+                    self._queue.extendleft(reversed(batch))
+                    print(f"⚠️ Error writing log batch ({self.stats['dropped']} rows dropped so far):", e)
+                    return
+                self.stats["rows"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["last_flush_seconds"] = time.perf_counter() - start
+
+    def close(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self.store.flush()
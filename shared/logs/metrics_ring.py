@@ -0,0 +1,239 @@
+# shared/logs/metrics_ring.py
+
+import os
+import time
+import atexit
+import hashlib
+from multiprocessing import shared_memory
+import numpy as np
+import psutil
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+
+RING_CAPACITY = 4096
+MAGIC = 0x314D5254454D4E41  # "ANMETRM1"
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "S19"),
+    ("cpu", "f8"),
+    ("memory", "f8"),
+    ("disk", "f8"),
+    ("anomaly", "i1"),
+], align=True)
+METRIC_FIELDS = ("cpu", "memory", "disk")
+
+# Header slots (uint64)
+H_MAGIC, H_CAPACITY, H_SEQ, H_WRITTEN, H_WRITER_PID, H_CLOSED = range(6)
+HEADER_SLOTS = 8
+HEADER_BYTES = HEADER_SLOTS * 8
+
+
+def ring_name(log_path):
+    """Shared-memory name for the ring that mirrors ``log_path`` (same for every process on the host)"""
+    digest = hashlib.sha1(os.path.abspath(log_path).encode("utf-8")).hexdigest()
+    return f"amr-{digest[:16]}"
+
+
+def _detach_from_tracker(shm):
+    """Stop this process's resource tracker from unlinking a segment it did not create"""
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+# Rings this process publishes, by shared-memory name
+_writers = {}
+
+
+class MetricsRing:
+    """Fixed-size ring of the latest metric samples in shared memory.
+
+    The collector that writes a log creates the ring and appends every row
+    it logs; dashboards attach by log path and read the newest rows straight
+    from memory. The header holds a sequence counter that the writer makes
+    odd while it updates a slot and even again afterwards, so a reader that
+    sees the same even value before and after copying knows the copy is
+    consistent, and retries otherwise. One writer per ring.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=shm.buf)
+        capacity = int(self.header[H_CAPACITY])
+        self.records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=shm.buf, offset=HEADER_BYTES)
+        self.capacity = capacity
+
+    @classmethod
+    def create(cls, log_path, capacity=RING_CAPACITY):
+        """Ring for a collector to publish into, or None if another live collector already owns it"""
+        name = ring_name(log_path)
+        if name in _writers:
+            return _writers[name]
+        size = HEADER_BYTES + capacity * RECORD_DTYPE.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=shm.buf)
+            writer = int(header[H_WRITER_PID])
+            if header[H_MAGIC] == MAGIC and not header[H_CLOSED] and writer != os.getpid() and psutil.pid_exists(writer):
+                print(f"⚠️ Metrics ring for {log_path} is owned by process {writer}, not publishing")
+                del header
+                shm.close()
+                return None
+            # Left behind by a collector that did not shut down cleanly: start over
+            del header
+            shm.close()
+            shm.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = 0
+        header[H_CAPACITY] = capacity
+        header[H_WRITER_PID] = os.getpid()
+        header[H_MAGIC] = MAGIC
+        del header
+        ring = _writers[name] = cls(shm, owner=True)
+        atexit.register(ring.close)
+        ring.seed(log_path)
+        return ring
+
+    def seed(self, log_path):
+        """Prefill a new ring with the log's newest rows, so charts keep their history across a collector restart"""
+        try:
+            rows = open_log_store(log_path, SERVER_LOG_SCHEMA).tail(self.capacity,
+                                                                    columns=("timestamp",) + METRIC_FIELDS + ("anomaly",))
+        except Exception as e:
+            print(f"⚠️ Error seeding metrics ring from {log_path}:", e)
+            return
+        for row in rows:
+            try:
+                self.append({"timestamp": row["timestamp"], "cpu": float(row["cpu"]), "memory": float(row["memory"]),
+                             "disk": float(row["disk"]), "anomaly": int(float(row.get("anomaly") or 0))})
+            except (TypeError, ValueError):
+                continue
+
+    @classmethod
+    def attach(cls, log_path):
+        """Read-only view of the ring for ``log_path``, or None if no collector is publishing it"""
+        try:
+            shm = shared_memory.SharedMemory(name=ring_name(log_path))
+        except (FileNotFoundError, ValueError):
+            return None
+        _detach_from_tracker(shm)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=shm.buf)
+        valid = header[H_MAGIC] == MAGIC and not header[H_CLOSED]
+        del header
+        if not valid:
+            shm.close()
+            return None
+        return cls(shm, owner=False)
+
+    def alive(self):
+        """False once the writer has closed the ring or died without closing it"""
+        return not self.header[H_CLOSED] and psutil.pid_exists(int(self.header[H_WRITER_PID]))
+
+    def append(self, row):
+        """Publish one logged row (needs timestamp, cpu, memory, disk, anomaly)"""
+        header = self.header
+        written = int(header[H_WRITTEN])
+        header[H_SEQ] += 1
+        record = self.records[written % self.capacity]
+        record["timestamp"] = str(row["timestamp"]).encode("ascii")[:19]
+        record["cpu"] = row["cpu"]
+        record["memory"] = row["memory"]
+        record["disk"] = row["disk"]
+        record["anomaly"] = row.get("anomaly", 0)
+        header[H_WRITTEN] = written + 1
+        header[H_SEQ] += 1
+
+    def latest(self, n, retries=1000):
+        """Copy of the newest ``n`` records (oldest first), or None if the writer kept racing the read"""
+        header = self.header
+        for _ in range(retries):
+            seq = header[H_SEQ]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            written = int(header[H_WRITTEN])
+            count = min(n, written, self.capacity)
+            start = (written - count) % self.capacity
+            if start + count <= self.capacity:
+                data = self.records[start:start + count].copy()
+            else:
+                data = np.concatenate((self.records[start:], self.records[:start + count - self.capacity]))
+            if header[H_SEQ] == seq:
+                return data
+        return None
+
+    def cursor(self):
+        """Number of records written so far, for ``read_since``"""
+        return int(self.header[H_WRITTEN])
+
+    def read_since(self, cursor, retries=1000):
+        """(records written after ``cursor``, new cursor); records the ring has already overwritten are skipped"""
+        for _ in range(retries):
+            seq = self.header[H_SEQ]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            written = int(self.header[H_WRITTEN])
+            data = self.latest(min(written - cursor, self.capacity)) if written > cursor else self.records[:0].copy()
+            if data is not None and self.header[H_SEQ] == seq:
+                return data, written
+        return self.records[:0].copy(), cursor
+
+    def close(self):
+        if self.shm is None:
+            return
+        if self.owner:
+            self.header[H_CLOSED] = 1
+        del self.header, self.records
+        name = self.shm.name
+        self.shm.close()
+        if self.owner:
+            _writers.pop(name, None)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
+
+
+_readers = {}
+
+
+def get_reader(log_path):
+    """This process's attachment to the ring for ``log_path`` (re-attached if the writer restarted), or None"""
+    if ring_name(log_path) in _writers:
+        # Published by this process: attaching a second handle would unregister it from the resource tracker
+        return _writers[ring_name(log_path)]
+    ring = _readers.get(log_path)
+    if ring is not None and ring.alive():
+        return ring
+    if ring is not None:
+        ring.close()
+        del _readers[log_path]
+    ring = MetricsRing.attach(log_path)
+    if ring is not None:
+        _readers[log_path] = ring
+    return ring
+
+
+def to_series(data):
+    """Chart series (lists per field) from ring records"""
+    metrics = {field: data[field].tolist() for field in METRIC_FIELDS}
+    metrics["timestamp"] = [ts.decode("ascii") for ts in data["timestamp"].tolist()]
+    return metrics
+
+
+def read_metrics(log_path, n):
+    """Chart series of the newest ``n`` samples from the collector's ring, or None to fall back to the log"""
+    ring = get_reader(log_path)
+    if ring is None:
+        return None
+    data = ring.latest(n)
+    if data is None or not len(data):
+        return None
+    return to_series(data)
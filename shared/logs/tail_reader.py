@@ -0,0 +1,203 @@
+# shared/logs/tail_reader.py
+
+import io
+import os
+import csv
+import threading
+from collections import deque
+
+BLOCK_SIZE = 64 * 1024
+
+# Column types of data/log.csv and data/server_log.csv
+LOG_TYPES = {
+    "cpu": float,
+    "memory": float,
+    "disk": float,
+    "anomaly": int,
+    "model_prediction": int,
+}
+
+
+def _convert(row, types):
+    for col, cast in types.items():
+        value = row.get(col)
+        if value in (None, ""):
+            continue
+        try:
+            row[col] = cast(float(value)) if cast is int else cast(value)
+        except ValueError:
+            pass
+    return row
+
+
+def is_anomaly(row):
+    return str(row.get("anomaly", "0")) == "1"
+
+
+class CsvTailReader:
+    """Reads the last rows of an append-only CSV log without parsing the whole file.
+
+    Record boundaries are found by scanning backwards from end-of-file. A newline
+    only ends a record if the number of quote characters after it is even, so
+    multi-line quoted fields (LLM explanations) are handled correctly.
+
+    The most recent ``window`` rows are cached together with the byte offset they
+    were read up to; later calls only parse bytes appended since then.
+    """
+
+    def __init__(self, path, window=1000, types=None):
+        self.path = path
+        self.window = window
+        self.types = LOG_TYPES if types is None else types
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._fieldnames = None
+        self._data_start = 0
+        self._rows = deque(maxlen=self.window)
+        self._offset = None
+        self._identity = None
+        self._complete = False  # True when the cache holds every row of the file
+
+    def _read_header(self, f):
+        f.seek(0)
+        line = f.readline()
+        self._fieldnames = next(csv.reader([line.decode("utf-8", errors="replace")]))
+        self._data_start = f.tell()
+
+    def _parse(self, data):
+        text = data.decode("utf-8", errors="replace")
+        reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=self._fieldnames)
+        return [_convert(row, self.types) for row in reader]
+
+    def _tail_offset(self, f, end, n):
+        """Byte offset at which the last ``n`` complete records before ``end`` start"""
+        pos = end
+        buf = b""
+        scan = 0
+        quotes = 0
+        found = 0
+        while pos > self._data_start:
+            start = max(self._data_start, pos - BLOCK_SIZE)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            buf = chunk + buf
+            if pos == end:
+                # Skip the terminator of the final record
+                scan = len(buf) - 1 if buf.endswith(b"\n") else len(buf)
+            else:
+                scan += len(chunk)
+            pos = start
+
+            while True:
+                i = buf.rfind(b"\n", 0, scan)
+                if i < 0:
+                    break
+                quotes += buf.count(b'"', i + 1, scan)
+                scan = i
+                if quotes % 2 == 0:
+                    found += 1
+                    if found == n:
+                        return pos + i + 1
+        return self._data_start
+
+    def _complete_end(self, data):
+        """Length of the prefix of ``data`` made of complete records"""
+        end = len(data)
+        while end > 0:
+            i = data.rfind(b"\n", 0, end)
+            if i < 0:
+                return 0
+            if data.count(b'"', 0, i) % 2 == 0:
+                return i + 1
+            end = i
+        return 0
+
+    def _refresh(self, n):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            return
+
+        identity = (stat.st_dev, stat.st_ino)
+        if identity != self._identity or (self._offset is not None and stat.st_size < self._offset):
+            # New, rotated or truncated file
+            self._reset()
+            self._identity = identity
+
+        with open(self.path, "rb") as f:
+            if self._fieldnames is None:
+                self._read_header(f)
+
+            if self._offset is None or (len(self._rows) < n and not self._complete):
+                if n > self._rows.maxlen:
+                    self._rows = deque(maxlen=n)
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(self._data_start)
+                start = self._tail_offset(f, size, self._rows.maxlen)
+                f.seek(start)
+                data = f.read(size - start)
+                end = self._complete_end(data)
+                self._rows.clear()
+                self._rows.extend(self._parse(data[:end]))
+                self._offset = start + end
+                self._complete = start == self._data_start
+                return
+
+            if stat.st_size > self._offset:
+                f.seek(self._offset)
+                data = f.read(stat.st_size - self._offset)
+                end = self._complete_end(data)
+                if end:
+                    self._rows.extend(self._parse(data[:end]))
+                    self._offset += end
+                    self._complete = self._complete and len(self._rows) < self._rows.maxlen
+
+    def tail(self, n):
+        """Last ``n`` rows, oldest first"""
+        with self._lock:
+            self._refresh(n)
+            rows = list(self._rows)[-n:] if n else []
+        return [dict(row) for row in rows]
+
+    def tail_matching(self, n, predicate=is_anomaly):
+        """Last ``n`` rows satisfying ``predicate``, newest first.
+
+        Looks in the cached window first and widens the backward scan
+        geometrically only when the window does not hold enough matches.
+        """
+        want = max(self.window, n)
+        while True:
+            with self._lock:
+                self._refresh(want)
+                rows = list(self._rows)
+                complete = self._complete
+            matches = [dict(row) for row in reversed(rows) if predicate(row)][:n]
+            if len(matches) >= n or complete:
+                return matches
+            want *= 4
+
+    @property
+    def fieldnames(self):
+        with self._lock:
+            if self._fieldnames is None:
+                self._refresh(1)
+            return list(self._fieldnames or [])
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def get_tail_reader(path, window=1000):
+    """Process-wide reader per log path, so the cached offset survives across requests"""
+    key = os.path.abspath(path)
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            reader = _readers[key] = CsvTailReader(path, window=window)
+        return reader
+
@@ -0,0 +1,73 @@
+# shared/ml/explanation_rules.py
+
+import operator
+import numpy as np
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+       "==": operator.eq, "!=": operator.ne}
+
+# Each rule: (code, prediction column, prediction value, conditions, text).
+# ``conditions`` is a list of alternatives (ORed); each alternative is a list
+# of (column, op, value) tests (ANDed). An empty list always matches.
+# Rules are evaluated as column masks over the whole batch, and each rule
+# owns one bit of the row's explanation code.
+BINARY_RULES = [
+    ("SYN_ERRORS", "Binary_Prediction", "Attack", [[("serror_rate", ">", 0.5)]], "High SYN error rate"),
+    ("REJ_ERRORS", "Binary_Prediction", "Attack", [[("rerror_rate", ">", 0.5)]], "High REJ error rate"),
+    ("NO_DATA", "Binary_Prediction", "Attack", [[("src_bytes", "==", 0), ("dst_bytes", "==", 0)]],
+     "No data transferred"),
+    ("NOT_LOGGED_IN", "Binary_Prediction", "Attack", [[("logged_in", "==", 0)]], "Unauthenticated access attempt"),
+    ("NORMAL_TRAFFIC", "Binary_Prediction", "Normal", [], "Normal traffic"),
+]
+
+MULTI_RULES = [
+    ("DOS_VOLUME", "Attack_Class", "DOS", [[("count", ">", 100)], [("serror_rate", ">", 0.5)]],
+     "High traffic volume or error rate"),
+    ("PROBE_SCAN", "Attack_Class", "PROBE", [[("srv_count", ">", 50)], [("diff_srv_rate", ">", 0.5)]],
+     "Scanning behavior across multiple services"),
+    ("R2L_LOGINS", "Attack_Class", "R2L", [[("num_failed_logins", ">", 0)]], "Failed login attempts detected"),
+    ("U2R_ESCALATION", "Attack_Class", "U2R", [[("root_shell", ">", 0)], [("num_file_creations", ">", 0)]],
+     "Privilege escalation or file access"),
+    ("NORMAL_BEHAVIOR", "Attack_Class", "normal", [], "Normal behavior"),
+]
+
+
+def _mask(df, scope_column, scope_value, conditions):
+    mask = (df[scope_column] == scope_value).to_numpy()
+    if not conditions:
+        return mask
+    matched = np.zeros(len(df), dtype=bool)
+    for alternative in conditions:
+        part = np.ones(len(df), dtype=bool)
+        for column, op, value in alternative:
+            part &= OPS[op](df[column].to_numpy(), value)
+        matched |= part
+    return mask & matched
+
+
+def explanation_codes(df, rules):
+    """Bitmask per row: bit i is set when ``rules[i]`` fires"""
+    if len(rules) > 32:
+        raise ValueError("At most 32 rules fit in an explanation code")
+    codes = np.zeros(len(df), dtype=np.uint32)
+    for bit, (_, scope_column, scope_value, conditions, _) in enumerate(rules):
+        codes |= _mask(df, scope_column, scope_value, conditions).astype(np.uint32) << np.uint32(bit)
+    return codes
+
+
+def render_code(code, rules):
+    """Text for one explanation code"""
+    return "; ".join(rule[4] for bit, rule in enumerate(rules) if int(code) >> bit & 1)
+
+
+def render_codes(codes, rules):
+    """Texts for many codes; each distinct code is rendered only once"""
+    unique, inverse = np.unique(codes, return_inverse=True)
+    texts = np.array([render_code(code, rules) for code in unique], dtype=object)
+    return texts[inverse].tolist()
+
+
+def explain_batch(df):
+    """(binary, multiclass) explanation texts for a frame with prediction columns"""
+    return (render_codes(explanation_codes(df, BINARY_RULES), BINARY_RULES),
+            render_codes(explanation_codes(df, MULTI_RULES), MULTI_RULES))
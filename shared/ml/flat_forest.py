@@ -0,0 +1,232 @@
+# shared/ml/flat_forest.py
+
+import os
+import time
+import argparse
+import joblib
+import numpy as np
+from shared.ml.model_registry import registry, BINARY_MODEL_FILE, MULTICLASS_MODEL_FILE
+from shared.data.feature_encoder import get_encoder
+
+FLAT_SUFFIX = ".flat.npz"
+BATCH_ROWS = 4096
+
+
+def flat_path_for(model_path):
+    return os.path.splitext(model_path)[0] + FLAT_SUFFIX
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+class FlatForest:
+    """A fitted RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one set of arrays (feature, threshold, left, right and
+    per-leaf class probabilities), indexed by global node id. Leaves point to
+    themselves with an infinite threshold, so evaluation is a fixed number of
+    vectorized steps (the deepest tree's depth) over every (row, tree) pair
+    with no per-node Python work. Probabilities are summed tree by tree in
+    the same order and precision as sklearn, so predictions match exactly.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, source_signature=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.source_signature = source_signature
+
+    @classmethod
+    def from_sklearn(cls, model, source_signature=None):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            ids = np.arange(tree.node_count, dtype=np.int32) + offset
+            is_leaf = tree.children_left == -1
+            lefts.append(np.where(is_leaf, ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, ids, tree.children_right + offset).astype(np.int32))
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), np.array(roots, dtype=np.int32),
+            max(estimator.tree_.max_depth for estimator in model.estimators_),
+            np.asarray(model.classes_), source_signature,
+        )
+
+    def _leaves(self, X):
+        """Leaf node id for every (row, tree) pair"""
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X):
+        # sklearn validates input to float32 before walking the trees
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), BATCH_ROWS):
+            leaves = self._leaves(X[start:start + BATCH_ROWS])
+            # cumsum adds the trees strictly left to right, like sklearn's accumulation loop
+            total = np.cumsum(self.value[leaves], axis=1, dtype=np.float64)[:, -1]
+            proba[start:start + len(leaves)] = total / len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def quantized(self):
+        """Copy with float32 thresholds and float16 leaf probabilities (no longer bit-exact)"""
+        return FlatForest(self.feature, self.threshold.astype(np.float32), self.left, self.right,
+                          self.value.astype(np.float16), self.roots, self.max_depth, self.classes_,
+                          self.source_signature)
+
+    def save(self, path, compressed=False):
+        tmp_path = path + ".tmp.npz"
+        savez = np.savez_compressed if compressed else np.savez
+        savez(tmp_path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 value=self.value, roots=self.roots, max_depth=self.max_depth,
+                 # String labels are stored as fixed-width text so loading needs no pickle
+                 classes=self.classes_.astype(str) if self.classes_.dtype == object else self.classes_,
+                 source_signature=self.source_signature if self.source_signature is not None else np.zeros(0))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            signature = data["source_signature"]
+            classes = data["classes"]
+            return cls(data["feature"], data["threshold"], data["left"], data["right"], data["value"],
+                       data["roots"], data["max_depth"], classes.astype(object) if classes.dtype.kind == "U" else classes,
+                       signature if len(signature) else None)
+
+
+def export_forest(model_path, model=None, quantized=False):
+    """Flatten a pickled forest next to it (``<name>.flat.npz``); returns the FlatForest"""
+    model = model if model is not None else joblib.load(model_path)
+    flat = FlatForest.from_sklearn(model, source_signature=_signature(model_path))
+    if quantized:
+        flat = flat.quantized()
+    flat.save(flat_path_for(model_path), compressed=quantized)
+    return flat
+
+
+def get_flat_model(model_path):
+    """Flat export of ``model_path`` if it is up to date, otherwise the sklearn model.
+
+    Hosts that only ship the ``.flat.npz`` (no pickle) always use the export.
+    """
+    flat_path = flat_path_for(model_path)
+    if os.path.exists(flat_path):
+        flat = registry.get(flat_path, loader=FlatForest.load)
+        if not os.path.exists(model_path):
+            return flat
+        if flat.source_signature is not None and np.array_equal(flat.source_signature, _signature(model_path)):
+            return flat
+    return registry.get(model_path)
+
+
+def get_flat_network_models(models_dir):
+    """(binary, multiclass) for single-row scoring in the live loops"""
+    return (
+        get_flat_model(os.path.join(models_dir, BINARY_MODEL_FILE)),
+        get_flat_model(os.path.join(models_dir, MULTICLASS_MODEL_FILE)),
+    )
+
+
+def score_connections(samples, models_dir):
+    """(prediction, class) to log for raw KDD feature rows.
+
+    Among the connections the binary model flags, the most common attack
+    class from the multiclass model is logged with prediction 1. If the
+    multiclass model calls every flagged connection "normal", the two
+    models disagree and ``(0, "normal")`` is logged, so the columns never
+    contradict each other.
+    """
+    if samples.empty:
+        return 0, "None"
+    binary_model, multi_model = get_flat_network_models(models_dir)
+    X = get_encoder(models_dir).transform(samples)
+    flagged = multi_model.predict(X)[binary_model.predict(X) == 1].astype(str)
+    attacks = flagged[flagged != "normal"]
+    if len(attacks) == 0:
+        return 0, "normal"
+    classes, counts = np.unique(attacks, return_counts=True)
+    return 1, str(classes[np.argmax(counts)])
+
+
+def _latency(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export trained forests to flat arrays, verify and benchmark them")
+    parser.add_argument("--models-dir", default="network_anomaly/models")
+    parser.add_argument("--verify", default="data/dataset/Test.txt",
+                        help="dataset whose predictions must match sklearn exactly ('' to skip)")
+    parser.add_argument("--repeats", type=int, default=200, help="single-row timing repeats")
+    args = parser.parse_args()
+
+    # Imported here: the live loops only need the evaluator, not the dataset tooling
+    from shared.data.dataset_cache import load_features_cached
+
+    X = None
+    if args.verify:
+        X, _, _ = load_features_cached(args.verify, get_encoder(args.models_dir), drop_unknown=False)
+
+    for name in (BINARY_MODEL_FILE, MULTICLASS_MODEL_FILE):
+        model_path = os.path.join(args.models_dir, name)
+        model = joblib.load(model_path)
+        flat = export_forest(model_path, model)
+        print(f"✅ Exported {name} -> {os.path.basename(flat_path_for(model_path))} "
+              f"({len(flat.feature)} nodes, depth {flat.max_depth})")
+        if X is None:
+            continue
+
+        start = time.perf_counter()
+        expected = model.predict(X)
+        sklearn_batch = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = flat.predict(X.to_numpy())
+        flat_batch = time.perf_counter() - start
+        mismatches = int(np.sum(expected != actual))
+        proba_equal = np.array_equal(model.predict_proba(X.iloc[:2000]), flat.predict_proba(X.to_numpy()[:2000]))
+        status = "✅" if mismatches == 0 and proba_equal else "❌"
+        print(f"{status} {name}: {mismatches} mismatches over {len(X)} rows, "
+              f"probabilities identical on first 2000: {proba_equal}")
+
+        row_frame = X.iloc[:1]
+        row_array = X.to_numpy()[0]
+        sklearn_row = _latency(lambda: model.predict(row_frame), args.repeats)
+        flat_row = _latency(lambda: flat.predict(row_array), args.repeats)
+        print(f"⏱️ {name}: single row {sklearn_row * 1e3:.2f} ms (sklearn) vs {flat_row * 1e3:.3f} ms (flat), "
+              f"batch of {len(X)} {sklearn_batch:.2f}s vs {flat_batch:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
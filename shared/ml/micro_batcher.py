@@ -0,0 +1,142 @@
+# shared/ml/micro_batcher.py
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+from shared.data.kdd_loader import FEATURE_COLUMNS
+
+MAX_RECORDS_PER_REQUEST = 10000
+MAX_ERRORS_REPORTED = 20
+
+
+class SchemaError(ValueError):
+    """Records that do not match the 41-feature schema; ``errors`` lists what is wrong"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+def records_to_frame(records, encoder):
+    """Validate connection records and return them as an encoded float32 feature frame.
+
+    Every record must be an object with all 41 KDD features. Categorical
+    fields take raw values ("tcp", "http", "SF") or integer codes; unseen
+    values fall into the encoder's unknown bucket. Extra fields are ignored.
+    """
+    if not isinstance(records, list) or not records:
+        raise SchemaError("Expected a non-empty JSON array of connection records")
+    if len(records) > MAX_RECORDS_PER_REQUEST:
+        raise SchemaError(f"At most {MAX_RECORDS_PER_REQUEST} records per request")
+    bad = [i for i, record in enumerate(records) if not isinstance(record, dict)]
+    if bad:
+        raise SchemaError("Every record must be a JSON object", [{"record": i} for i in bad[:MAX_ERRORS_REPORTED]])
+
+    df = pd.DataFrame.from_records(records, columns=FEATURE_COLUMNS)
+    errors = []
+    for col in FEATURE_COLUMNS:
+        values = df[col]
+        if col in encoder.categories:
+            text = values.astype(str)
+            codes = pd.Categorical(text, categories=encoder.categories[col]).codes.astype(np.int32)
+            # Numeric codes are accepted as-is, anything else unseen is "unknown"
+            numeric = pd.to_numeric(values, errors="coerce")
+            is_code = (codes < 0) & numeric.notna().to_numpy()
+            codes[is_code] = numeric[is_code].astype(np.int32)
+            unknown = encoder.unknown_code(col)
+            codes[(codes < 0) | (codes > unknown)] = unknown
+            missing = values.isna().to_numpy()
+            df[col] = codes
+        else:
+            numeric = pd.to_numeric(values, errors="coerce")
+            missing = numeric.isna().to_numpy()
+            df[col] = numeric
+        for i in np.flatnonzero(missing)[:MAX_ERRORS_REPORTED - len(errors)]:
+            errors.append({"record": int(i), "field": col,
+                           "error": "missing" if pd.isna(values.iloc[i]) else "not a number"})
+    if errors:
+        raise SchemaError("Records do not match the 41-feature schema", errors)
+    return df.astype(np.float32)
+
+
+class MicroBatcher:
+    """Coalesces concurrent prediction requests into one model call.
+
+    ``submit`` queues a feature frame and returns a Future. A single worker
+    thread waits up to ``max_wait`` seconds after the first queued request for
+    others to arrive (or until ``max_rows`` are queued), runs ``predict_fn``
+    once over the concatenated batch and hands each caller its slice of the
+    results. ``predict_fn`` takes a frame and returns a dict of equal-length
+    lists.
+    """
+
+    def __init__(self, predict_fn, max_wait=0.005, max_rows=8192):
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "rows": 0, "batches": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        future = Future()
+        with self._ready:
+            self._queue.append((frame, future))
+            self._ready.notify()
+        return future
+
+    def _take_batch(self):
+        with self._ready:
+            while not self._queue:
+                self._ready.wait()
+            deadline = time.monotonic() + self.max_wait
+            rows = sum(len(frame) for frame, _ in self._queue)
+            while rows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+                rows = sum(len(frame) for frame, _ in self._queue)
+            batch = []
+            rows = 0
+            while self._queue and (not batch or rows + len(self._queue[0][0]) <= self.max_rows):
+                frame, future = self._queue.popleft()
+                batch.append((frame, future))
+                rows += len(frame)
+            return batch, rows
+
+    def _run(self):
+        while True:
+            batch, rows = self._take_batch()
+            with self._stats_lock:
+                self.stats["requests"] += len(batch)
+                self.stats["rows"] += rows
+                self.stats["batches"] += 1
+            try:
+                frames = [frame for frame, _ in batch]
+                results = self.predict_fn(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True))
+            except Exception as e:
+                with self._stats_lock:
+                    self.stats["errors"] += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for frame, future in batch:
+                end = start + len(frame)
+                future.set_result({key: values[start:end] for key, values in results.items()})
+                start = end
+
+    def metrics(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["avg_batch_rows"] = round(stats["rows"] / stats["batches"], 1) if stats["batches"] else 0
+        stats["queued"] = len(self._queue)
+        return stats
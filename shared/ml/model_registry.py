@@ -0,0 +1,129 @@
+# shared/ml/model_registry.py
+
+import os
+import time
+import pickle
+import hashlib
+import threading
+import joblib
+
+BINARY_MODEL_FILE = "binary_model.pkl"
+MULTICLASS_MODEL_FILE = "multiclass_model.pkl"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _estimate_size(model):
+    """Approximate in-memory footprint of a model via its pickled size"""
+    try:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """Loads each model file once per process and hot-swaps it when the file changes.
+
+    File changes are detected with a cheap ``os.stat`` (mtime + size) at most
+    every ``check_interval`` seconds; the content hash is only recomputed when
+    the stat changed, so touching a file without rewriting it does not reload.
+    """
+
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, path, loader=joblib.load):
+        path = os.path.abspath(path)
+        entry = self._entries.get(path)
+        now = time.monotonic()
+
+        if entry is not None and now - entry["checked_at"] < self.check_interval:
+            return entry["model"]
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+
+        with load_lock:
+            entry = self._entries.get(path)
+            stat = os.stat(path)
+            if entry is not None and (stat.st_mtime, stat.st_size) == entry["stat"]:
+                entry["checked_at"] = now
+                return entry["model"]
+
+            sha256 = file_sha256(path)
+            if entry is not None and sha256 == entry["sha256"]:
+                entry["stat"] = (stat.st_mtime, stat.st_size)
+                entry["checked_at"] = now
+                return entry["model"]
+
+            start = time.perf_counter()
+            model = loader(path)
+            load_seconds = time.perf_counter() - start
+
+            new_entry = {
+                "model": model,
+                "stat": (stat.st_mtime, stat.st_size),
+                "sha256": sha256,
+                "load_seconds": load_seconds,
+                "memory_bytes": _estimate_size(model),
+                "file_bytes": stat.st_size,
+                "loaded_at": time.time(),
+                "checked_at": now,
+                "version": entry["version"] + 1 if entry else 1,
+            }
+            # Single dict assignment: readers see either the old or the new model
+            self._entries[path] = new_entry
+
+        action = "Reloaded" if new_entry["version"] > 1 else "Loaded"
+        print(f"📦 {action} {os.path.basename(path)} in {load_seconds:.2f}s "
+              f"(~{new_entry['memory_bytes'] / 1e6:.1f} MB)")
+        return model
+
+    def version(self, path):
+        """Content hash of the currently loaded model, or None if not loaded"""
+        entry = self._entries.get(os.path.abspath(path))
+        return entry["sha256"] if entry else None
+
+    def stats(self):
+        """Load time, memory footprint and version info for every loaded model"""
+        return {
+            path: {
+                "version": entry["version"],
+                "sha256": entry["sha256"],
+                "load_seconds": round(entry["load_seconds"], 4),
+                "memory_bytes": entry["memory_bytes"],
+                "file_bytes": entry["file_bytes"],
+                "loaded_at": entry["loaded_at"],
+            }
+            for path, entry in list(self._entries.items())
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide default registry
+registry = ModelRegistry()
+
+
+def get_model(path):
+    return registry.get(path)
+
+
+def get_network_models(models_dir):
+    """Return (binary_model, multiclass_model) from a models directory"""
+    return (
+        registry.get(os.path.join(models_dir, BINARY_MODEL_FILE)),
+        registry.get(os.path.join(models_dir, MULTICLASS_MODEL_FILE)),
+    )
@@ -0,0 +1,196 @@
+# shared/ml/prediction_store.py
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from shared.data.dataset_cache import CACHE_DIR, CACHE_FORMAT, file_fingerprint, load_features_cached, load_kdd_cached
+from shared.data.feature_encoder import get_encoder
+from shared.data.kdd_loader import features
+from shared.ml.model_registry import registry, BINARY_MODEL_FILE, MULTICLASS_MODEL_FILE
+from shared.ml.explanation_rules import BINARY_RULES, MULTI_RULES, explanation_codes, render_codes, explain_batch
+
+PREDICT_CHUNK_ROWS = 50000
+
+
+def _binary_labels(predictions):
+    return np.where(np.asarray(predictions) == 0, "Normal", "Attack").astype(object)
+
+
+# (model file, its explanation rules, how its predictions map to the rules' scope values)
+MODEL_OUTPUTS = [
+    (BINARY_MODEL_FILE, BINARY_RULES, _binary_labels),
+    (MULTICLASS_MODEL_FILE, MULTI_RULES, np.asarray),
+]
+
+
+class DatasetPredictions:
+    """Predictions and explanation codes for every row of one dataset file"""
+
+    def __init__(self, binary, binary_codes, multi, multi_codes):
+        self.binary = binary
+        self.binary_codes = binary_codes
+        self.multi = multi
+        self.multi_codes = multi_codes
+
+    def __len__(self):
+        return len(self.binary)
+
+    def annotate(self, df):
+        """Add prediction/explanation columns to a slice of the dataset (index = row number)"""
+        positions = df.index.to_numpy()
+        df = df.copy()
+        df["Binary_Prediction"] = _binary_labels(self.binary[positions])
+        df["Attack_Class"] = self.multi[positions]
+        df["Explanation_Binary"] = render_codes(self.binary_codes[positions], BINARY_RULES)
+        df["Explanation_Multi"] = render_codes(self.multi_codes[positions], MULTI_RULES)
+        return df
+
+
+class PredictionStore:
+    """Whole-dataset predictions, computed once in the background and kept on disk.
+
+    Each model's results live in their own cache entry keyed on the dataset
+    hash, that model's file hash and the encoder version, so swapping one
+    model only recomputes that model's half. ``lookup`` never blocks: if an
+    entry is missing it schedules the work and returns None, and callers fall
+    back to predicting just the rows they show.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_workers=1):
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="predictions")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    def _entry_dir(self, dataset_path, model_path, encoder):
+        dataset_sha = file_fingerprint(dataset_path, self.cache_dir)
+        registry.get(model_path)
+        model_sha = registry.version(model_path)
+        return os.path.join(self.cache_dir, f"pred-{dataset_sha[:16]}-{model_sha[:12]}-{encoder.version}-v{CACHE_FORMAT}")
+
+    def _compute_entry(self, dataset_path, model_path, encoder, rules, to_labels, entry_dir):
+        """Predict every row in chunks and publish the entry"""
+        X, _, _ = load_features_cached(dataset_path, encoder, drop_unknown=False, cache_dir=self.cache_dir)
+        raw = load_kdd_cached(dataset_path, drop_unknown=False, cache_dir=self.cache_dir)
+        model = registry.get(model_path)
+        classes = np.asarray(model.classes_)
+
+        predictions = np.empty(len(X), dtype=np.int16)
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            chunk = model.predict(X.iloc[start:start + PREDICT_CHUNK_ROWS])
+            predictions[start:start + len(chunk)] = np.searchsorted(classes, chunk)
+
+        scope_column = rules[0][1]
+        codes = explanation_codes(raw.assign(**{scope_column: to_labels(classes[predictions])}), rules)
+
+        tmp_dir = entry_dir + f".tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        np.save(os.path.join(tmp_dir, "predictions.npy"), predictions)
+        np.save(os.path.join(tmp_dir, "codes.npy"), codes)
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"format": CACHE_FORMAT, "rows": len(predictions), "classes": classes.tolist(),
+                       "model": os.path.basename(model_path)}, f)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another worker published the same entry first
+            pass
+
+    def _read_entry(self, entry_dir):
+        with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+        predictions = np.load(os.path.join(entry_dir, "predictions.npy"), mmap_mode="r")
+        codes = np.load(os.path.join(entry_dir, "codes.npy"), mmap_mode="r")
+        return np.array(meta["classes"], dtype=object)[predictions], codes
+
+    def _entries(self, dataset_path, models_dir):
+        encoder = get_encoder(models_dir)
+        return [
+            (os.path.join(models_dir, name), encoder, rules, to_labels,
+             self._entry_dir(dataset_path, os.path.join(models_dir, name), encoder))
+            for name, rules, to_labels in MODEL_OUTPUTS
+        ]
+
+    def _assemble(self, entries):
+        key = tuple(entry[-1] for entry in entries)
+        predictions = self._loaded.get(key)
+        if predictions is None:
+            (binary, binary_codes), (multi, multi_codes) = [self._read_entry(entry_dir) for entry_dir in key]
+            predictions = DatasetPredictions(binary.astype(np.int8), binary_codes, multi, multi_codes)
+            self._loaded = {key: predictions}
+        return predictions
+
+    def _run(self, dataset_path, model_path, encoder, rules, to_labels, entry_dir):
+        try:
+            print(f"🧮 Precomputing {os.path.basename(model_path)} predictions for {os.path.basename(dataset_path)}...")
+            self._compute_entry(dataset_path, model_path, encoder, rules, to_labels, entry_dir)
+            print(f"✅ {os.path.basename(model_path)} predictions for {os.path.basename(dataset_path)} cached.")
+        except Exception as e:
+            print("⚠️ Error precomputing predictions:", e)
+        finally:
+            with self._lock:
+                self._pending.discard(entry_dir)
+
+    def lookup(self, dataset_path, models_dir):
+        """Cached predictions for a dataset, or None while they are (re)computed in the background"""
+        entries = self._entries(dataset_path, models_dir)
+        missing = [entry for entry in entries if not os.path.exists(os.path.join(entry[-1], "meta.json"))]
+        if not missing:
+            return self._assemble(entries)
+        with self._lock:
+            for entry in missing:
+                if entry[-1] not in self._pending:
+                    self._pending.add(entry[-1])
+                    self._executor.submit(self._run, dataset_path, *entry)
+        return None
+
+    def compute(self, dataset_path, models_dir):
+        """Cached predictions for a dataset, computing any missing half in the caller's thread"""
+        entries = self._entries(dataset_path, models_dir)
+        for entry in entries:
+            if not os.path.exists(os.path.join(entry[-1], "meta.json")):
+                self._compute_entry(dataset_path, *entry)
+        return self._assemble(entries)
+
+
+# Process-wide store shared by the dashboards
+prediction_store = PredictionStore()
+
+
+def predict_frame(df, dataset_path, models_dir):
+    """Predictions and explanations for a slice of a dataset (index = row number).
+
+    Served from the prediction store when the whole file has been scored with
+    the current models; otherwise just these rows are predicted inline while
+    the store catches up in the background.
+    """
+    predictions = prediction_store.lookup(dataset_path, models_dir)
+    if predictions is not None:
+        return predictions.annotate(df)
+
+    binary_model = registry.get(os.path.join(models_dir, BINARY_MODEL_FILE))
+    multiclass_model = registry.get(os.path.join(models_dir, MULTICLASS_MODEL_FILE))
+    X = features(get_encoder(models_dir).transform(df))
+    df = df.copy()
+    df["Binary_Prediction"] = _binary_labels(binary_model.predict(X))
+    df["Attack_Class"] = multiclass_model.predict(X)
+    df["Explanation_Binary"], df["Explanation_Multi"] = explain_batch(df)
+    return df
+
+
+def score_features(X, models_dir):
+    """Predictions and explanations for an encoded feature frame, as JSON-ready lists"""
+    binary_model = registry.get(os.path.join(models_dir, BINARY_MODEL_FILE))
+    multiclass_model = registry.get(os.path.join(models_dir, MULTICLASS_MODEL_FILE))
+    scored = X.assign(Binary_Prediction=_binary_labels(binary_model.predict(X)),
+                      Attack_Class=multiclass_model.predict(X))
+    explanation_binary, explanation_multi = explain_batch(scored)
+    return {
+        "binary_prediction": scored["Binary_Prediction"].tolist(),
+        "attack_class": scored["Attack_Class"].astype(str).tolist(),
+        "explanation_binary": explanation_binary,
+        "explanation_multi": explanation_multi,
+    }
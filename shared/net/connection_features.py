@@ -0,0 +1,277 @@
+# shared/net/connection_features.py
+
+import time
+import json
+import socket
+import argparse
+from collections import deque, namedtuple
+import pandas as pd
+import psutil
+from shared.data.kdd_loader import FEATURE_COLUMNS
+
+# One observed connection; ports are ints, protocol is "tcp" / "udp"
+Connection = namedtuple("Connection", "ts protocol src_ip src_port dst_ip dst_port status")
+
+# Well-known ports -> NSL-KDD service names; anything else is "private" (KDD's catch-all)
+SERVICES = {
+    20: "ftp_data", 21: "ftp", 22: "ssh", 23: "telnet", 25: "smtp", 53: "domain_u", 67: "other",
+    69: "tftp_u", 79: "finger", 80: "http", 109: "pop_2", 110: "pop_3", 111: "sunrpc", 113: "auth",
+    119: "nntp", 123: "ntp_u", 137: "netbios_ns", 138: "netbios_dgm", 139: "netbios_ssn", 143: "imap4",
+    179: "bgp", 194: "IRC", 389: "ldap", 443: "http_443", 512: "exec", 513: "login", 514: "shell",
+    515: "printer", 540: "uucp", 543: "klogin", 544: "kshell", 6000: "X11", 8001: "http_8001",
+}
+
+# Socket states -> closest KDD connection flag
+FLAGS = {
+    "ESTABLISHED": "SF", "FIN_WAIT1": "SF", "FIN_WAIT2": "SF", "TIME_WAIT": "SF", "CLOSE_WAIT": "SF",
+    "LAST_ACK": "SF", "CLOSING": "SF", "SYN_SENT": "S0", "SYN_RECV": "S1", "CLOSE": "REJ", "NONE": "SF",
+}
+SYN_ERROR_FLAGS = {"S0", "S1", "S2", "S3"}
+REJ_ERROR_FLAGS = {"REJ"}
+
+# NSL-KDD clips the count features at these values, so the models never saw larger ones
+COUNT_CAP = 511
+HOST_COUNT_CAP = 255
+
+
+class _Counts(dict):
+    """dict of counters that drops keys at zero, so memory tracks the live window"""
+
+    def add(self, key, amount=1):
+        value = self.get(key, 0) + amount
+        if value:
+            self[key] = value
+        else:
+            del self[key]
+
+
+class _Window:
+    """Per-host / per-service counters over a window of connections.
+
+    Every connection entering or leaving the window updates a fixed number of
+    counters, so both operations are O(1) and the counters only hold keys
+    that appear in the window.
+    """
+
+    def __init__(self):
+        self.events = deque()
+        self.host = _Counts()
+        self.host_serror = _Counts()
+        self.host_rerror = _Counts()
+        self.srv = _Counts()
+        self.srv_serror = _Counts()
+        self.srv_rerror = _Counts()
+        self.host_srv = _Counts()
+        self.host_src_port = _Counts()
+
+    def _update(self, event, amount):
+        _, host, service, src_port, serror, rerror = event
+        self.host.add(host, amount)
+        self.srv.add(service, amount)
+        self.host_srv.add((host, service), amount)
+        self.host_src_port.add((host, src_port), amount)
+        if serror:
+            self.host_serror.add(host, amount)
+            self.srv_serror.add(service, amount)
+        if rerror:
+            self.host_rerror.add(host, amount)
+            self.srv_rerror.add(service, amount)
+
+    def push(self, event):
+        self.events.append(event)
+        self._update(event, 1)
+
+    def pop(self):
+        self._update(self.events.popleft(), -1)
+
+    def __len__(self):
+        return len(self.events)
+
+
+def _rate(part, whole):
+    return round(part / whole, 2) if whole else 0.0
+
+
+class ConnectionFeatureExtractor:
+    """KDD traffic features for a stream of connections.
+
+    Time-based features (``count``, ``srv_count``, the error and same/diff
+    service rates) cover connections in the last ``window_seconds``;
+    host-based ``dst_host_*`` features cover the last ``host_window``
+    connections (255, the largest ``dst_host_count`` in the training data).
+    "Host" is the connection's server side and "service" the KDD name of its
+    port. Content features (bytes, logins, shells...) are not observable from
+    socket tables and are 0.
+    Memory is bounded by ``max_window_events`` plus ``host_window`` entries.
+    """
+
+    def __init__(self, window_seconds=2.0, host_window=HOST_COUNT_CAP, max_window_events=100000):
+        self.window_seconds = window_seconds
+        self.host_window = host_window
+        self.max_window_events = max_window_events
+        self.recent = _Window()
+        self.last_n = _Window()
+
+    def add(self, conn):
+        """Record ``conn`` and return its 41 KDD features (categoricals as raw strings)"""
+        service = SERVICES.get(conn.dst_port, "private")
+        flag = FLAGS.get(conn.status, "SF")
+        host = conn.dst_ip
+        event = (conn.ts, host, service, conn.src_port, flag in SYN_ERROR_FLAGS, flag in REJ_ERROR_FLAGS)
+
+        recent = self.recent
+        horizon = conn.ts - self.window_seconds
+        while recent.events and (recent.events[0][0] < horizon or len(recent) >= self.max_window_events):
+            recent.pop()
+        recent.push(event)
+        last_n = self.last_n
+        if len(last_n) >= self.host_window:
+            last_n.pop()
+        last_n.push(event)
+
+        count = recent.host[host]
+        srv_count = recent.srv[service]
+        same_srv = recent.host_srv[(host, service)]
+        dst_host_count = last_n.host[host]
+        dst_host_srv_count = last_n.srv[service]
+        dst_same_srv = last_n.host_srv[(host, service)]
+
+        sample = dict.fromkeys(FEATURE_COLUMNS, 0)
+        sample.update({
+            "protocol_type": conn.protocol,
+            "service": service,
+            "flag": flag,
+            "count": min(count, COUNT_CAP),
+            "srv_count": min(srv_count, COUNT_CAP),
+            "serror_rate": _rate(recent.host_serror.get(host, 0), count),
+            "srv_serror_rate": _rate(recent.srv_serror.get(service, 0), srv_count),
+            "rerror_rate": _rate(recent.host_rerror.get(host, 0), count),
+            "srv_rerror_rate": _rate(recent.srv_rerror.get(service, 0), srv_count),
+            "same_srv_rate": _rate(same_srv, count),
+            "diff_srv_rate": _rate(count - same_srv, count),
+            "srv_diff_host_rate": _rate(srv_count - same_srv, srv_count),
+            "dst_host_count": min(dst_host_count, HOST_COUNT_CAP),
+            "dst_host_srv_count": min(dst_host_srv_count, HOST_COUNT_CAP),
+            "dst_host_same_srv_rate": _rate(dst_same_srv, dst_host_count),
+            "dst_host_diff_srv_rate": _rate(dst_host_count - dst_same_srv, dst_host_count),
+            "dst_host_same_src_port_rate": _rate(last_n.host_src_port[(host, conn.src_port)], dst_host_count),
+            "dst_host_srv_diff_host_rate": _rate(dst_host_srv_count - dst_same_srv, dst_host_srv_count),
+            "dst_host_serror_rate": _rate(last_n.host_serror.get(host, 0), dst_host_count),
+            "dst_host_srv_serror_rate": _rate(last_n.srv_serror.get(service, 0), dst_host_srv_count),
+            "dst_host_rerror_rate": _rate(last_n.host_rerror.get(host, 0), dst_host_count),
+            "dst_host_srv_rerror_rate": _rate(last_n.srv_rerror.get(service, 0), dst_host_srv_count),
+        })
+        return sample
+
+    def frame(self, connections):
+        """Feature rows for a batch of connections, as a DataFrame[FEATURE_COLUMNS]"""
+        return pd.DataFrame([self.add(conn) for conn in connections], columns=FEATURE_COLUMNS)
+
+
+class ConnectionTracker:
+    """Turns successive connection-table snapshots into newly seen connections"""
+
+    def __init__(self):
+        self._seen = set()
+
+    def diff(self, rows, ts):
+        """Connections in ``rows`` (snapshot dicts) that were not in the previous snapshot"""
+        listening = {row["laddr"][1] for row in rows if row.get("status") == "LISTEN"}
+        current = set()
+        new = []
+        for row in rows:
+            laddr, raddr = row.get("laddr"), row.get("raddr")
+            if not raddr:
+                continue
+            key = (row.get("type", "tcp"), tuple(laddr), tuple(raddr))
+            current.add(key)
+            if key in self._seen:
+                continue
+            # Inbound when our side is a listening port: the peer is the client
+            if laddr[1] in listening:
+                src_ip, src_port, dst_ip, dst_port = raddr[0], raddr[1], laddr[0], laddr[1]
+            else:
+                src_ip, src_port, dst_ip, dst_port = laddr[0], laddr[1], raddr[0], raddr[1]
+            new.append(Connection(ts, row.get("type", "tcp"), src_ip, src_port, dst_ip, dst_port,
+                                  row.get("status", "NONE")))
+        self._seen = current
+        return new
+
+
+def snapshot_connections():
+    """Current socket table as plain dicts (the format recordings use)"""
+    rows = []
+    try:
+        connections = psutil.net_connections(kind="inet")
+    except psutil.AccessDenied:
+        print("⚠️ Not permitted to read the connection table (try running as admin/root)")
+        return rows
+    for conn in connections:
+        rows.append({
+            "type": "udp" if conn.type == socket.SOCK_DGRAM else "tcp",
+            "laddr": [conn.laddr.ip, conn.laddr.port] if conn.laddr else None,
+            "raddr": [conn.raddr.ip, conn.raddr.port] if conn.raddr else None,
+            "status": conn.status,
+        })
+    return rows
+
+
+class ConnectionMonitor:
+    """Polls the live connection table and returns KDD feature rows for new connections"""
+
+    def __init__(self, extractor=None, snapshot=snapshot_connections):
+        self.tracker = ConnectionTracker()
+        self.extractor = extractor or ConnectionFeatureExtractor()
+        self.snapshot = snapshot
+
+    def poll(self, ts=None):
+        ts = time.time() if ts is None else ts
+        return self.extractor.frame(self.tracker.diff(self.snapshot(), ts))
+
+
+def record_connections(path, seconds, interval=1.0):
+    """Append ``{"ts", "connections"}`` snapshots to a JSONL file for later replay"""
+    with open(path, "a") as f:
+        end = time.time() + seconds
+        while time.time() < end:
+            f.write(json.dumps({"ts": time.time(), "connections": snapshot_connections()}) + "\n")
+            f.flush()
+            time.sleep(interval)
+
+
+def replay_connections(path):
+    """Yield new connections from a recording, with their recorded timestamps"""
+    tracker = ConnectionTracker()
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                snapshot = json.loads(line)
+                yield from tracker.diff(snapshot["connections"], snapshot["ts"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record connection tables or replay them through the feature extractor")
+    parser.add_argument("--record", help="append live snapshots to this JSONL file")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--replay", help="replay a recording and report throughput")
+    parser.add_argument("--output", help="write the replayed feature rows to this CSV")
+    args = parser.parse_args()
+
+    if args.record:
+        record_connections(args.record, args.seconds)
+        print(f"✅ Recorded {args.seconds:.0f}s of connection tables to {args.record}")
+    if args.replay:
+        connections = list(replay_connections(args.replay))
+        extractor = ConnectionFeatureExtractor()
+        start = time.perf_counter()
+        rows = [extractor.add(conn) for conn in connections]
+        elapsed = time.perf_counter() - start
+        rate = len(rows) / elapsed if elapsed else 0
+        print(f"⏱️ {len(rows)} connections in {elapsed:.3f}s ({rate:,.0f}/s)")
+        if args.output:
+            pd.DataFrame(rows, columns=FEATURE_COLUMNS).to_csv(args.output, index=False)
+            print(f"📝 Features written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
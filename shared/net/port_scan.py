@@ -0,0 +1,297 @@
+# shared/net/port_scan.py
+
+import sys
+import math
+import time
+import random
+import argparse
+from array import array
+from collections import deque
+from functools import lru_cache
+from shared.net.connection_features import ConnectionTracker, snapshot_connections
+
+MASK64 = (1 << 64) - 1
+# Longest source key: a full IPv6 address
+MAX_SOURCE_KEY = "ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff"
+
+
+def _mix64(x):
+    """splitmix64 finalizer: spreads small integers (ports) over all 64 bits"""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+@lru_cache(maxsize=None)
+def _port_slots(precision):
+    """(register index, rank) of every port 0-65535 for a HyperLogLog of this precision"""
+    index, rank = array("B"), array("B")
+    low_bits = 64 - precision
+    for port in range(65536):
+        h = _mix64(port)
+        index.append(h >> low_bits)
+        rest = h & ((1 << low_bits) - 1)
+        rank.append(low_bits - rest.bit_length() + 1)
+    return index, rank
+
+
+def hll_estimate(registers):
+    """HyperLogLog cardinality estimate, with linear counting for small sets"""
+    m = len(registers)
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    estimate = alpha * m * m / sum(2.0 ** -r for r in registers)
+    zeros = registers.count(0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return estimate
+
+
+class CountMinSketch:
+    """Fixed-size overestimating counter table (``depth`` rows of ``width`` uint32)"""
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("I", bytes(4 * width)) for _ in range(depth)]
+
+    def _columns(self, key):
+        h = hash(key) & MASK64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key, amount=1):
+        for row, column in zip(self.rows, self._columns(key)):
+            row[column] += amount
+
+    def nbytes(self):
+        return 4 * self.width * self.depth
+
+
+class _Slice:
+    """One time slice of the window: attempt counts plus per-source port sketches"""
+
+    def __init__(self, start, cms_width, cms_depth):
+        self.start = start
+        self.attempts = CountMinSketch(cms_width, cms_depth)
+        self.sources = {}
+
+
+class PortScanDetector:
+    """Distinct destination ports per source over a sliding time window.
+
+    The window is split into ``slices`` equal time slices that expire whole.
+    Each slice keeps a count-min sketch of connection attempts per source
+    (fixed memory, never undercounts) and a port sketch per source: the exact
+    ports while they fit in the space of a HyperLogLog (2 bytes each), then a
+    dense HyperLogLog. A source is flagged once the union of its sketches over
+    the live slices reaches ``port_threshold`` distinct ports, which is exact
+    for thresholds up to ``registers / 2``. The union is only evaluated for
+    sources whose windowed attempt count has reached the threshold, since
+    distinct ports can never exceed attempts.
+
+    Per-slice port sketches are capped at ``max_sources``. When a slice is
+    full, the oldest-touched source that is not a heavy hitter (attempts below
+    the threshold) is evicted, so floods of one-off remote IPs cannot push a
+    scanner out. Memory is bounded by ``memory_bounds()``.
+    """
+
+    def __init__(self, window_seconds=60, slices=6, port_threshold=10, precision=6,
+                 cms_width=1 << 15, cms_depth=4, max_sources=50000, eviction_scan=8):
+        self.window_seconds = window_seconds
+        self.slice_seconds = window_seconds / slices
+        self.slices = slices
+        self.port_threshold = port_threshold
+        self.precision = precision
+        self.registers = 1 << precision
+        self.sparse_limit = self.registers // 2
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+        self.max_sources = max_sources
+        self.eviction_scan = eviction_scan
+        self._index, self._rank = _port_slots(precision)
+        self._window = deque()
+        self._alerted = {}
+        self._pending = {}
+        self.stats = {"events": 0, "evictions": 0, "estimates": 0, "alerts": 0}
+
+    def _current_slice(self, ts):
+        start = ts - ts % self.slice_seconds
+        window = self._window
+        if not window or window[-1].start < start:
+            window.append(_Slice(start, self.cms_width, self.cms_depth))
+        while window[0].start <= start - self.window_seconds:
+            window.popleft()
+        return window[-1]
+
+    def _attempts(self, source):
+        """Windowed count-min estimate of connection attempts from ``source``"""
+        columns = self._window[-1].attempts._columns(source)
+        return min(sum(s.attempts.rows[i][column] for s in self._window) for i, column in enumerate(columns))
+
+    def _densify(self, ports):
+        registers = bytearray(self.registers)
+        for port in ports:
+            index, rank = self._index[port], self._rank[port]
+            if rank > registers[index]:
+                registers[index] = rank
+        return registers
+
+    def _distinct_ports(self, source):
+        sketches = [s.sources[source] for s in self._window if source in s.sources]
+        if all(isinstance(sketch, array) for sketch in sketches):
+            return len(set().union(*sketches))
+        merged = bytearray(self.registers)
+        for sketch in sketches:
+            if isinstance(sketch, array):
+                sketch = self._densify(sketch)
+            merged = bytes(map(max, merged, sketch))
+        return hll_estimate(merged)
+
+    def _evict(self, current):
+        sources = current.sources
+        candidates = []
+        for source in sources:
+            candidates.append(source)
+            if len(candidates) >= self.eviction_scan:
+                break
+        victim = next((s for s in candidates if self._attempts(s) < self.port_threshold), candidates[0])
+        del sources[victim]
+        self.stats["evictions"] += 1
+
+    def add(self, ts, source, port):
+        """Record a connection attempt from ``source`` to destination ``port``"""
+        current = self._current_slice(ts)
+        current.attempts.add(source)
+        self.stats["events"] += 1
+
+        sources = current.sources
+        sketch = sources.pop(source, None)
+        if sketch is None:
+            if len(sources) >= self.max_sources:
+                self._evict(current)
+            sketch = array("H")
+        # Re-inserting keeps the dict in least-recently-touched order for eviction
+        sources[source] = sketch
+        if isinstance(sketch, array):
+            if port in sketch:
+                return
+            if len(sketch) < self.sparse_limit:
+                sketch.append(port)
+            else:
+                sources[source] = sketch = self._densify(sketch)
+        if not isinstance(sketch, array):
+            index, rank = self._index[port], self._rank[port]
+            if rank <= sketch[index]:
+                return
+            sketch[index] = rank
+
+        if source in self._alerted and ts - self._alerted[source] < self.window_seconds:
+            return
+        if self._attempts(source) < self.port_threshold:
+            return
+        self.stats["estimates"] += 1
+        ports = self._distinct_ports(source)
+        if ports >= self.port_threshold:
+            self._alerted[source] = ts
+            self._pending[source] = round(ports)
+            self.stats["alerts"] += 1
+
+    def add_connections(self, connections):
+        """Record Connection tuples: the side that opened each one hitting the port it connected to"""
+        for conn in connections:
+            self.add(conn.ts, conn.src_ip, conn.dst_port)
+
+    def pop_alerts(self, ts=None):
+        """{source: estimated distinct ports} flagged since the last call (each source once per window)"""
+        alerts, self._pending = self._pending, {}
+        if ts is not None:
+            self._alerted = {s: t for s, t in self._alerted.items() if ts - t < self.window_seconds}
+        return alerts
+
+    def memory_bounds(self):
+        """Worst-case bytes held by the sketches, from the configuration alone.
+
+        Per source: the larger of a full sparse sketch and a dense one, the
+        longest key, and the dict holding ``max_sources`` of them, all sized
+        with ``sys.getsizeof`` of the real objects.
+        """
+        cms = self.slices * (self.cms_depth * sys.getsizeof(array("I", bytes(4 * self.cms_width)))
+                             + sys.getsizeof([None] * self.cms_depth))
+        sketch = max(sys.getsizeof(array("H", range(self.sparse_limit))), sys.getsizeof(bytearray(self.registers)))
+        table = sys.getsizeof(dict.fromkeys(range(self.max_sources)))
+        ports = self.slices * (table + self.max_sources * (sketch + sys.getsizeof(MAX_SOURCE_KEY)))
+        return {"count_min_bytes": cms, "port_sketch_bytes": ports, "total_bytes": cms + ports}
+
+    def memory_usage(self):
+        """Bytes held right now, summed over the live objects with ``sys.getsizeof``"""
+        cms = sum(sum(sys.getsizeof(row) for row in s.attempts.rows) + sys.getsizeof(s.attempts.rows)
+                  for s in self._window)
+        ports = sum(sys.getsizeof(s.sources) + sum(sys.getsizeof(source) + sys.getsizeof(sketch)
+                                                   for source, sketch in s.sources.items())
+                    for s in self._window)
+        return {"count_min_bytes": cms, "port_sketch_bytes": ports, "total_bytes": cms + ports,
+                "tracked_sources": sum(len(s.sources) for s in self._window)}
+
+
+class PortScanMonitor:
+    """Feeds connections that appear in the live socket table into a PortScanDetector.
+
+    The source is the side that opened the connection and the port is the
+    one it connected to, so both inbound scans of this host and outbound
+    scanning from it are caught.
+    """
+
+    def __init__(self, detector=None, snapshot=snapshot_connections):
+        self.detector = detector or PortScanDetector()
+        self.tracker = ConnectionTracker()
+        self.snapshot = snapshot
+
+    def poll(self, ts=None):
+        """{source: estimated distinct ports} for sources flagged since the last poll"""
+        ts = time.time() if ts is None else ts
+        self.detector.add_connections(self.tracker.diff(self.snapshot(), ts))
+        return self.detector.pop_alerts(ts)
+
+
+def simulate(detector, benign_sources, scanners, ports_per_scanner, seconds, seed=42):
+    """Synthetic traffic: one-off benign sources plus scanners sweeping ports; returns (events, seconds)"""
+    rng = random.Random(seed)
+    events = [(rng.uniform(0, seconds), f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+               rng.choice((80, 443, 22, 53))) for i in range(benign_sources)]
+    for n in range(scanners):
+        start = rng.uniform(0, seconds - detector.window_seconds / 2)
+        ports = rng.sample(range(1, 65536), ports_per_scanner)
+        step = detector.window_seconds / 2 / ports_per_scanner
+        events += [(start + i * step, f"203.0.113.{n}", port) for i, port in enumerate(ports)]
+    events.sort()
+    start = time.perf_counter()
+    for ts, source, port in events:
+        detector.add(ts, source, port)
+    return len(events), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the port-scan detector on synthetic traffic")
+    parser.add_argument("--benign", type=int, default=300000, help="distinct one-off remote IPs")
+    parser.add_argument("--scanners", type=int, default=20)
+    parser.add_argument("--ports", type=int, default=30, help="distinct ports each scanner hits")
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--threshold", type=int, default=10)
+    parser.add_argument("--window", type=float, default=60)
+    parser.add_argument("--max-sources", type=int, default=50000)
+    args = parser.parse_args()
+
+    detector = PortScanDetector(window_seconds=args.window, port_threshold=args.threshold,
+                                max_sources=args.max_sources)
+    events, elapsed = simulate(detector, args.benign, args.scanners, args.ports, args.seconds)
+    alerts = detector.pop_alerts()
+    found = sum(1 for source in alerts if source.startswith("203.0.113."))
+    print(f"⏱️ {events} events in {elapsed:.2f}s ({events / elapsed:,.0f}/s)")
+    print(f"🚨 {found}/{args.scanners} scanners flagged, {len(alerts) - found} false positives")
+    print(f"📦 Memory now {detector.memory_usage()}, bound {detector.memory_bounds()}")
+    print(f"📊 {detector.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,106 @@
 import os
+import json
 import zipfile
-import pandas as pd
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report
-from sklearn.utils import resample
-
-# === Setup ===
-os.makedirs("models", exist_ok=True)
-os.makedirs("data", exist_ok=True)
-
-# === Unzip Dataset if needed ===
-if not os.path.exists("data/dataset/Train.txt"):
-    with zipfile.ZipFile("dataset.zip", 'r') as zip_ref:
-        zip_ref.extractall("data")
-
-# === Column names for dataset ===
-columns = ["duration", "protocol_type", "service", "flag", "src_bytes", "dst_bytes", "land",
-"wrong_fragment", "urgent", "hot", "num_failed_logins", "logged_in",
-"num_compromised", "root_shell", "su_attempted", "num_root", "num_file_creations",
-"num_shells", "num_access_files", "num_outbound_cmds", "is_host_login",
-"is_guest_login", "count", "srv_count", "serror_rate", "srv_serror_rate",
-"rerror_rate", "srv_rerror_rate", "same_srv_rate", "diff_srv_rate", "srv_diff_host_rate",
-"dst_host_count", "dst_host_srv_count", "dst_host_same_srv_rate",
-"dst_host_diff_srv_rate", "dst_host_same_src_port_rate", "dst_host_srv_diff_host_rate",
-"dst_host_serror_rate", "dst_host_srv_serror_rate", "dst_host_rerror_rate", "dst_host_srv_rerror_rate",
-"attack", "last_flag"]
-
-# === Load dataset ===
-df = pd.read_csv("data/dataset/Train.txt", names=columns)
-
-# === Binary attack labels ===
-df["attack_binary"] = df["attack"].apply(lambda x: 0 if x == "normal" else 1)
-
-# === Multiclass mapping ===
-def classify_attack(x):
-    if x in ["neptune", "smurf", "back", "pod", "teardrop", "land"]:
-        return "DOS"
-    elif x in ["satan", "ipsweep", "nmap", "portsweep"]:
-        return "PROBE"
-    elif x in ["ftp_write", "guess_passwd", "imap", "multihop", "phf", "spy", "warezclient", "warezmaster"]:
-        return "R2L"
-    elif x in ["buffer_overflow", "loadmodule", "perl", "rootkit"]:
-        return "U2R"
-    elif x == "normal":
-        return "normal"
-    else:
-        return "unknown"
-
-df["attack_multi"] = df["attack"].apply(classify_attack)
-
-# === Filter out unknowns (optional) ===
-df = df[df["attack_multi"] != "unknown"]
-
-# === Encode categorical columns ===
-for col in ["protocol_type", "service", "flag"]:
-    df[col] = LabelEncoder().fit_transform(df[col])
-
-# === Features and labels ===
-X = df.drop(columns=["attack", "last_flag", "attack_binary", "attack_multi"])
-# Filter unknowns before anything else
-df = df[df["attack_multi"] != "unknown"]
-
-# Now define labels (after filtering)
-y_binary = df["attack_binary"]
-y_multi = df["attack_multi"]
-
-
-# === Train Binary Classifier (Normal vs Attack) ===
-X_train_bin, X_test_bin, y_train_bin, y_test_bin = train_test_split(
-    X, y_binary, test_size=0.2, stratify=y_binary, random_state=42
-)
-
-clf_binary = RandomForestClassifier(n_estimators=100, class_weight="balanced", random_state=42)
-clf_binary.fit(X_train_bin, y_train_bin)
-joblib.dump(clf_binary, "models/binary_model.pkl")
-print("✅ Binary model trained and saved.")
-
-# === Train Multiclass Classifier (DOS, PROBE, etc.) ===
-X_train_multi, X_test_multi, y_train_multi, y_test_multi = train_test_split(
-    X, y_multi, test_size=0.2, stratify=y_multi, random_state=42
-)
-
-clf_multi = RandomForestClassifier(n_estimators=100, class_weight="balanced", random_state=42)
-clf_multi.fit(X_train_multi, y_train_multi)
-joblib.dump(clf_multi, "models/multiclass_model.pkl")
-print("✅ Multiclass model trained and saved.")
+from shared.data.feature_encoder import CategoricalEncoder, ENCODER_FILE
+from shared.data.kdd_loader import features, timed_stage
+from shared.data.dataset_cache import load_kdd_cached
+from shared.ml.flat_forest import export_forest
+
+
+def unzip_dataset_if_needed(train_path):
+    if not os.path.exists(train_path):
+        with zipfile.ZipFile("dataset.zip", 'r') as zip_ref:
+            zip_ref.extract("Train.txt", os.path.dirname(train_path))
+
+
+def prepare(train_path, models_dir, chunk_size, report):
+    """One preprocessing pass shared by both models"""
+    with timed_stage("load", report):
+        df = load_kdd_cached(train_path, chunksize=chunk_size)
+    print(f"📥 Loaded {len(df)} rows ({df.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory)")
+
+    # === Encode categorical columns (saved next to the models for reuse) ===
+    with timed_stage("encode", report):
+        encoder = CategoricalEncoder.fit(df)
+        encoder.save(os.path.join(models_dir, ENCODER_FILE))
+        df = encoder.transform(df, inplace=True)
+    print(f"✅ Feature encoder {encoder.version} saved.")
+
+    X = features(df)
+    return X, df["attack_binary"], df["attack_multi"]
+
+
+def train_forest(name, X, y, n_estimators, n_jobs, output_path):
+    """Split, fit and save one forest; returns its stage report"""
+    report = {}
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, stratify=y, random_state=42
+    )
+    clf = RandomForestClassifier(n_estimators=n_estimators, class_weight="balanced",
+                                 random_state=42, n_jobs=n_jobs)
+    with timed_stage(f"train {name}", report):
+        clf.fit(X_train, y_train)
+    with timed_stage(f"save {name}", report):
+        joblib.dump(clf, output_path)
+        # Flat node arrays for low-latency single-row scoring in the live loops
+        export_forest(output_path, clf)
+    report[f"holdout accuracy {name}"] = round(clf.score(X_test, y_test) * 100, 2)
+    print(f"✅ {name.capitalize()} model trained and saved.")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the binary and multiclass network models")
+    parser.add_argument("--train-path", default="data/dataset/Train.txt")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help="total cores to use (-1 = all); split evenly between the two models")
+    parser.add_argument("--executor", choices=["thread", "process", "sequential"], default="thread",
+                        help="how to run the two models concurrently")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="read the training file in chunks of this many rows")
+    parser.add_argument("--report", default=None, help="training report JSON (default: <models-dir>/training_report.json)")
+    args = parser.parse_args()
+
+    os.makedirs(args.models_dir, exist_ok=True)
+    unzip_dataset_if_needed(args.train_path)
+
+    report = {}
+    X, y_binary, y_multi = prepare(args.train_path, args.models_dir, args.chunk_size, report)
+
+    cores = (os.cpu_count() or 1) if args.n_jobs == -1 else args.n_jobs
+    per_model_jobs = max(1, cores // 2) if args.executor != "sequential" else cores
+    jobs = [
+        ("binary", X, y_binary, args.n_estimators, per_model_jobs,
+         os.path.join(args.models_dir, "binary_model.pkl")),
+        ("multiclass", X, y_multi, args.n_estimators, per_model_jobs,
+         os.path.join(args.models_dir, "multiclass_model.pkl")),
+    ]
+
+    with timed_stage("train both", report):
+        if args.executor == "sequential":
+            results = [train_forest(*job) for job in jobs]
+        else:
+            # Tree building releases the GIL, so threads avoid copying X into workers
+            pool_cls = ThreadPoolExecutor if args.executor == "thread" else ProcessPoolExecutor
+            with pool_cls(max_workers=2) as pool:
+                results = list(pool.map(train_forest, *zip(*jobs)))
+    for result in results:
+        report.update(result)
+
+    report["config"] = {"n_estimators": args.n_estimators, "cores": cores,
+                        "jobs_per_model": per_model_jobs, "executor": args.executor}
+    report_path = args.report or os.path.join(args.models_dir, "training_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"\n📝 Training report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,17 @@
 import psutil
 import socket
-import time
-from collections import defaultdict
-import csv
+from shared.logs.log_store import open_log_store, SERVER_LOG_SCHEMA
+from shared.llm.explanation_worker import resolve_pending
+from shared.net.port_scan import PortScanDetector, PortScanMonitor
+from shared.host.process_table import get_top_apps
+from shared.host.system_anomaly import SystemAnomalyDetector
 
 previous_connections = set()
-port_scan_tracker = defaultdict(int)
 port_scan_window = 10  # seconds
 port_threshold = 10  # number of ports hit in short time
-
-def detect_anomaly(cpu, memory, disk):
-    if cpu > 85:
-        return True, "High CPU Usage", "High"
-    elif memory > 85:
-        return True, "High Memory Usage", "Medium"
-    elif disk > 90:
-        return True, "High Disk Usage", "Medium"
-    return False, None, None
-
-def get_top_apps():
-    top = {"cpu": ("N/A", 0), "memory": ("N/A", 0), "disk": ("N/A", 0)}
-
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-        try:
-            name = proc.info['name']
-            cpu = proc.info['cpu_percent']
-            memory = proc.info['memory_percent']
-
-            if cpu > top["cpu"][1]:
-                top["cpu"] = (name, cpu)
-            if memory > top["memory"][1]:
-                top["memory"] = (name, memory)
-
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue
-
-    disk_usage = psutil.disk_usage('/')
-    top["disk"] = ("Disk IO", disk_usage.percent)
-
-    return {
-        "cpu": {"name": top["cpu"][0], "value": round(top["cpu"][1], 2)},
-        "memory": {"name": top["memory"][0], "value": round(top["memory"][1], 2)},
-        "disk": {"name": top["disk"][0], "value": round(top["disk"][1], 2)}
-    }
+port_scan_monitor = PortScanMonitor(PortScanDetector(window_seconds=port_scan_window, port_threshold=port_threshold))
+BASELINE_STATE = "data/baselines-main.npz"  # per collector: concurrent collectors would overwrite each other
+system_anomaly_detector = None  # created on first use, so dashboards importing this module never touch the state
 
 def detect_new_ips(seen_ips):
     new_ips = []
@@ -55,39 +24,31 @@ def detect_new_ips(seen_ips):
                     seen_ips.add(ip)
     return new_ips
 
-def detect_port_scan():
-    global port_scan_tracker
-    suspicious_ips = []
-
-    for conn in psutil.net_connections(kind='inet'):
-        if conn.raddr:
-            ip = conn.raddr.ip
-            port_scan_tracker[ip] += 1
-
-    now = time.time()
-    for ip, count in list(port_scan_tracker.items()):
-        if count > port_threshold:
-            suspicious_ips.append(ip)
-            del port_scan_tracker[ip]  # reset after detection
+def detect_anomaly(cpu, memory, disk):
+    """Scores every metric against this host's streaming baselines (fixed thresholds while they warm up)"""
+    global system_anomaly_detector
+    if system_anomaly_detector is None:
+        system_anomaly_detector = SystemAnomalyDetector(BASELINE_STATE)
+    return system_anomaly_detector.detect(cpu, memory, disk)
 
-    return suspicious_ips
+def detect_port_scan():
+    """Source IPs (remote hosts, or this host when it scans out) that hit at least port_threshold distinct ports within port_scan_window"""
+    return list(port_scan_monitor.poll())
 
 def get_recent_explanations(csv_path="data/log.csv", limit=10):
     explanations = []
     try:
-        with open(csv_path, "r") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-            for row in rows[-limit:]:
-                explanations.append({
-                    "timestamp": row.get("timestamp", ""),
-                    "anomaly_type": row.get("anomaly_type", ""),
-                    "severity": row.get("severity", ""),
-                    "top_app_name": row.get("top_app_name", ""),
-                    "explanation": row.get("explanation", "N/A"),
-                    "model_prediction": row.get("model_prediction", "N/A"),
-                    "model_class": row.get("model_class", "N/A")
-                })
+        rows = open_log_store(csv_path, SERVER_LOG_SCHEMA).tail(limit)
+        for row in resolve_pending(rows):
+            explanations.append({
+                "timestamp": row.get("timestamp", ""),
+                "anomaly_type": row.get("anomaly_type", ""),
+                "severity": row.get("severity", ""),
+                "top_app_name": row.get("top_app_name", ""),
+                "explanation": row.get("explanation", "N/A"),
+                "model_prediction": row.get("model_prediction", "N/A"),
+                "model_class": row.get("model_class", "N/A")
+            })
     except Exception as e:
         print("⚠️ Error reading recent explanations:", e)
 